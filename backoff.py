@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""Экспоненциальная задержка со случайным разбросом для повторных попыток."""
+import random
+
+
+class Backoff:
+    """Задержка растёт как base * 2**attempt до cap; берётся случайная доля ("full jitter")."""
+
+    def __init__(self, base=0.5, cap=60.0):
+        self.base = base
+        self.cap = cap
+        self.attempt = 0
+
+    def next(self):
+        ceiling = self.base * 2 ** self.attempt
+        # Дальше cap расти незачем: при многочасовом сбое 2**attempt переполнил бы float
+        if ceiling < self.cap:
+            self.attempt += 1
+        return random.uniform(0, min(self.cap, ceiling))
+
+    def reset(self):
+        self.attempt = 0
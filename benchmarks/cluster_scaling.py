@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Масштабирование многопроцессного режима: завершения опроса в секунду при 1..N обработчиках.
+
+Для каждого числа процессов поднимаются ShardRouter с процессами quizbot.app.run_shard и
+FakeBotAPI в отдельных процессах на общем порту, чтобы фейковый API не делил GIL
+с ботом. Пользователи проходят опрос, как в e2e_throughput.py.
+
+Рост близок к линейному, пока процессов не больше свободных ядер: на машине
+с одним ядром цифры покажут только накладные расходы раздачи.
+
+Запуск: python benchmarks/cluster_scaling.py --processes 1 2 4 --users 200 --concurrency 50
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from e2e_throughput import Harness, percentile
+from fake_bot_api import RemoteReplies, serve_process
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run(processes, args, first_chat_id):
+    """Один прогон; возвращает (завершений в секунду, p50 и p99 шага ответа в секундах)."""
+    context = multiprocessing.get_context('spawn')
+    port = free_port()
+    replies = context.Queue()
+    options = {'latency': args.latency}
+    api_processes = [context.Process(target=serve_process, args=(port, index, args.api_processes, replies, options),
+                                     daemon=True) for index in range(args.api_processes)]
+    for process in api_processes:
+        process.start()
+    os.environ['TELEGRAM_API_URL'] = f"http://127.0.0.1:{port}/bot{{0}}/{{1}}"
+
+    from quizbot import app, runtime
+    from cluster import ShardRouter
+    from ratelimit import SharedTokenBucket
+    router = ShardRouter(app.run_shard, processes,
+                         args=(SharedTokenBucket(args.global_rate, context=context),), context=context).start()
+    feed = RemoteReplies(replies)
+    try:
+        quiz = runtime.questionnaires.current
+        # Прогрев: процессы импортируют бота и устанавливают соединения с API
+        warmup = Harness(router.dispatch, feed.wait_reply, quiz, args.back_rate, 60, args.seed)
+        with ThreadPoolExecutor(processes * 4) as pool:
+            list(pool.map(warmup.run_user, range(first_chat_id, first_chat_id + processes * 4)))
+
+        harness = Harness(router.dispatch, feed.wait_reply, quiz, args.back_rate, args.timeout, args.seed)
+        first_chat_id += processes * 4
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            completed = sum(pool.map(harness.run_user, range(first_chat_id, first_chat_id + args.users)))
+        elapsed = time.perf_counter() - started
+    finally:
+        router.stop()
+        for process in api_processes:
+            process.terminate()
+    answers = harness.latencies.get('answer', [])
+    return completed / elapsed, percentile(answers, 0.5), percentile(answers, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--api-processes', type=int, default=4)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=8, help="UPDATE_WORKERS в каждом процессе")
+    parser.add_argument('--back-rate', type=float, default=0.1)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--global-rate', type=float, default=10000, help="общий OUTBOUND_GLOBAL_RATE")
+    parser.add_argument('--chat-rate', type=float, default=100)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bot-cluster-bench-')
+    os.environ.update({
+        'BOT_TOKEN': '0:benchmark',
+        'ADMIN_CHAT_ID': '-1',
+        'UPDATE_WORKERS': str(args.workers),
+        'OUTBOUND_CHAT_RATE': str(args.chat_rate),
+        'NOTIFY_DB_PATH': os.path.join(workdir, 'notifications.db'),
+        'EVENT_LOG_PATH': os.path.join(workdir, 'events.log'),
+        'NOTIFY_WINDOW': '0.5',
+    })
+
+    print(f"Ядер: {os.cpu_count()}, процессов API: {args.api_processes}, пользователей: {args.users}")
+    print(f"{'процессов':>10} {'завершений/с':>13} {'ускорение':>10} {'p50, мс':>9} {'p99, мс':>9}")
+    baseline = None
+    first_chat_id = 1
+    for processes in args.processes:
+        rate, p50, p99 = run(processes, args, first_chat_id)
+        first_chat_id += args.users + processes * 4
+        baseline = baseline or rate
+        print(f"{processes:>10} {rate:>13.1f} {rate / baseline:>9.2f}x {p50 * 1000:>9.1f} {p99 * 1000:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Холодный старт: время от запуска python main.py до первого ответа пользователю.
+
+FakeBotAPI держит одно необработанное обновление /start; бот запускается в режиме
+polling отдельным процессом, замер останавливается, когда API получает приветствие.
+Исходники бота копируются во временный каталог в двух вариантах: без байткода
+(PYTHONDONTWRITEBYTECODE, как в образе без compileall) и после
+compileall --invalidation-mode unchecked-hash, как в Dockerfile.
+
+Запуск: python benchmarks/cold_start.py --runs 5 [--budget 800]
+--budget — порог медианы для собранного варианта в мс; при превышении код выхода 1.
+"""
+import argparse
+import glob
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from e2e_throughput import start_update
+from fake_bot_api import FakeBotAPI
+
+CHAT_ID = 1
+
+
+def copy_app(target):
+    """Только то, что попадает в образ (см. Dockerfile)."""
+    os.makedirs(target)
+    for path in glob.glob(os.path.join(ROOT, '*.py')) + [os.path.join(ROOT, 'questionnaire.json')]:
+        shutil.copy(path, target)
+    shutil.copytree(os.path.join(ROOT, 'quizbot'), os.path.join(target, 'quizbot'),
+                    ignore=shutil.ignore_patterns('__pycache__'))
+
+
+def measure(app_dir, env, timeout):
+    """Секунды до первого ответа бота или None, если бот не ответил за timeout."""
+    api = FakeBotAPI(updates=[start_update(CHAT_ID)]).start()
+    workdir = tempfile.mkdtemp(prefix='bot-cold-')
+    env = dict(env, TELEGRAM_API_URL=api.api_url,
+               NOTIFY_DB_PATH=os.path.join(workdir, 'notifications.db'),
+               EVENT_LOG_PATH=os.path.join(workdir, 'events.log'))
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'main.py'], cwd=app_dir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        reply = api.wait_reply(CHAT_ID, timeout=timeout)
+        elapsed = time.perf_counter() - started
+    finally:
+        process.kill()
+        process.wait()
+        api.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return elapsed if reply is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, help="порог медианы собранного варианта, мс")
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix='bot-cold-app-')
+    env = dict(os.environ, BOT_TOKEN='0:benchmark', ADMIN_CHAT_ID='-1', BOT_MODE='polling',
+               BOT_PROCESSES='1', METRICS_PORT='0')
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    variants = []
+    source = os.path.join(base, 'source')
+    copy_app(source)
+    variants.append(("без байткода", source, dict(env, PYTHONDONTWRITEBYTECODE='1')))
+    compiled = os.path.join(base, 'compiled')
+    copy_app(compiled)
+    subprocess.run([sys.executable, '-m', 'compileall', '-q', '--invalidation-mode', 'unchecked-hash', compiled],
+                   check=True)
+    variants.append(("compileall", compiled, env))
+
+    medians = {}
+    try:
+        print(f"{'вариант':<14} {'медиана, мс':>12} {'мин, мс':>9} {'макс, мс':>9}")
+        for name, app_dir, variant_env in variants:
+            # Первый запуск прогревает страничный кэш и не учитывается
+            measure(app_dir, variant_env, args.timeout)
+            times = [measure(app_dir, variant_env, args.timeout) for _ in range(args.runs)]
+            if None in times:
+                print(f"{name:<14} бот не ответил за {args.timeout} с")
+                sys.exit(1)
+            medians[name] = statistics.median(times) * 1000
+            print(f"{name:<14} {medians[name]:>12.1f} {min(times) * 1000:>9.1f} {max(times) * 1000:>9.1f}")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    if args.budget is not None and medians["compileall"] > args.budget:
+        print(f"Медиана {medians['compileall']:.1f} мс больше бюджета {args.budget:.0f} мс")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
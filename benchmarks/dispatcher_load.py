@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Нагрузочный тест ChatDispatcher: пропускная способность в зависимости от числа воркеров.
+
+Запуск: python benchmarks/dispatcher_load.py [--chats 200] [--steps 16] [--latency 0.005]
+Обработчик имитирует 2-3 синхронных запроса к Telegram задержкой latency на обновление.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dispatcher import ChatDispatcher
+
+
+def make_updates(chats, steps):
+    updates = []
+    update_id = 0
+    for step in range(steps):
+        for chat_id in range(chats):
+            update_id += 1
+            message = SimpleNamespace(chat=SimpleNamespace(id=chat_id), message_id=step)
+            updates.append(SimpleNamespace(update_id=update_id, message=None,
+                                           callback_query=SimpleNamespace(message=message)))
+    return updates
+
+
+def run(workers, updates, latency):
+    seen = {}
+    lock = threading.Lock()
+    violations = []
+
+    def process(batch):
+        time.sleep(latency)
+        message = batch[0].callback_query.message
+        with lock:
+            last = seen.get(message.chat.id, -1)
+            if message.message_id != last + 1:
+                violations.append(message.chat.id)
+            seen[message.chat.id] = message.message_id
+
+    dispatcher = ChatDispatcher(process, workers=workers)
+    started = time.perf_counter()
+    dispatcher.dispatch(updates)
+    dispatcher.join()
+    elapsed = time.perf_counter() - started
+    dispatcher.stop()
+    return len(updates) / elapsed, violations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chats', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    updates = make_updates(args.chats, args.steps)
+    baseline = None
+    print(f"{'workers':>8} {'updates/s':>12} {'speedup':>8}")
+    for workers in args.workers:
+        throughput, violations = run(workers, updates, args.latency)
+        if violations:
+            raise SystemExit(f"Нарушен порядок обновлений в чатах: {sorted(set(violations))[:10]}")
+        baseline = baseline or throughput
+        print(f"{workers:>8} {throughput:>12.0f} {throughput / baseline:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
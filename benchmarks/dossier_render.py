@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Бенчмарк сборки досье для администратора: прежняя конкатенация против готового шаблона.
+
+Запуск: python benchmarks/dossier_render.py [--renders 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from questionnaire import load_questionnaire, parse_definition
+
+PATH = os.path.join(ROOT, 'questionnaire.json')
+QUIZ = load_questionnaire(PATH)
+with open(PATH, 'rb') as f:
+    DEFINITION = parse_definition(f.read(), PATH)
+
+
+def escape_before(text):
+    escape_chars = r'_*[]()~`>#+-=|{}.!'
+    return ''.join(f'\\{char}' if char in escape_chars else char for char in text)
+
+
+def render_before(answers):
+    # Прежний путь: словарь ответов, словарь разделов и += на каждый пункт
+    data = {question['key']: question['answers'][opt_index]['text']
+            for question, opt_index in zip(DEFINITION['questions'], answers)}
+    message_text = "*--- Досье диагностики ---*\n"
+    report_data = {section['name']: [(item['label'], data.get(item['question'])) for item in section['items']]
+                   for section in DEFINITION['dossier']['sections']}
+    for block_name, items in report_data.items():
+        message_text += f"\n*{escape_before(block_name)}:*\n"
+        for item_name, item_value in items:
+            value_str = escape_before(str(item_value) or "Не отвечено")
+            message_text += f"• {escape_before(item_name)}: _{value_str}_\n"
+    return message_text
+
+
+def measure(render, answer_sets):
+    started = time.perf_counter()
+    for answers in answer_sets:
+        render(answers)
+    return time.perf_counter() - started
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--renders', type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    answer_sets = [tuple(rng.randrange(len(labels)) for labels in QUIZ.answer_labels)
+                   for _ in range(args.renders)]
+
+    for name, render in (('before', render_before), ('after', QUIZ.render_dossier)):
+        seconds = measure(render, answer_sets)
+        print(f"{name:>7}: {seconds * 1000:8.1f} мс на {args.renders} досье, "
+              f"{seconds / args.renders * 1e6:6.1f} мкс на досье")
+
+
+if __name__ == '__main__':
+    main_()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""Сквозной прогон бота против FakeBotAPI: N пользователей проходят опрос целиком.
+
+Каждый пользователь: /start -> start_quiz -> 14 ответов (со случайными "Назад") -> вердикт.
+Кнопки выбираются из клавиатур, которые бот действительно прислал. Отчёт: завершений в
+секунду, p50/p99 задержки по типам шагов, пиковый RSS процесса (бот и фейковый API вместе).
+
+Запуск: python benchmarks/e2e_throughput.py --users 200 --concurrency 50 --latency 0.02
+"""
+import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_bot_api import FakeBotAPI
+from questionnaire import parse_callback
+
+_update_ids = itertools.count(1)
+
+
+def start_update(chat_id):
+    user = {'id': chat_id, 'is_bot': False, 'first_name': "Тест"}
+    return {'update_id': next(_update_ids), 'message': {
+        'message_id': next(_update_ids), 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}, 'from': user,
+        'text': '/start', 'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}]}}
+
+
+def callback_update(chat_id, message_id, data):
+    user = {'id': chat_id, 'is_bot': False, 'first_name': "Тест"}
+    return {'update_id': next(_update_ids), 'callback_query': {
+        'id': str(next(_update_ids)), 'chat_instance': 'bench', 'data': data, 'from': user,
+        'message': {'message_id': message_id, 'date': 0, 'chat': {'id': chat_id, 'type': 'private'}}}}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def route_kind(quiz, data):
+    """Тип кнопки по её callback_data: 'answer', 'back', 'feedback_thanks'..."""
+    route = quiz.routes.get(parse_callback(data)[1])
+    return route.kind if route is not None else None
+
+
+class Harness:
+    """process(список JSON обновлений) передаёт их боту, wait_reply(chat_id, timeout) ждёт ответа."""
+
+    def __init__(self, process, wait_reply, quiz, back_rate, timeout, seed, duplicate_rate=0.0):
+        self.process = process
+        self.wait_reply = wait_reply
+        self.quiz = quiz
+        self.back_rate = back_rate
+        self.timeout = timeout
+        self.seed = seed
+        self.duplicate_rate = duplicate_rate
+        self.latencies = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def kind_of(self, data):
+        return route_kind(self.quiz, data)
+
+    def step(self, kind, chat_id, payload, rng=None):
+        """Отправляет обновление боту и ждёт его ответа с клавиатурой.
+
+        С вероятностью duplicate_rate нажатие доставляется повторно и сразу же
+        повторяется пользователем (двойное нажатие); ответ на них бот слать не должен.
+        """
+        started = time.perf_counter()
+        payloads = [payload]
+        if rng is not None and 'callback_query' in payload and rng.random() < self.duplicate_rate:
+            call = payload['callback_query']
+            payloads += [payload, callback_update(chat_id, call['message']['message_id'], call['data'])]
+        self.process(payloads)
+        reply = self.wait_reply(chat_id, self.timeout)
+        if reply is not None:
+            with self._lock:
+                self.latencies[kind].append(time.perf_counter() - started)
+        return reply
+
+    def run_user(self, chat_id):
+        """True, если пользователь дошёл до вердикта."""
+        rng = random.Random(self.seed * 1000003 + chat_id)
+        reply = self.step('start', chat_id, start_update(chat_id))
+        if reply is None:
+            return False
+        message_id, markup = reply
+        start_data = markup['inline_keyboard'][0][0]['callback_data']
+        reply = self.step('start_quiz', chat_id, callback_update(chat_id, message_id, start_data), rng)
+        while reply is not None:
+            message_id, markup = reply
+            buttons = [button for row in markup['inline_keyboard'] for button in row]
+            kinds = {b['callback_data']: self.kind_of(b['callback_data']) for b in buttons if 'callback_data' in b}
+            if len(kinds) < len(buttons) or 'feedback_thanks' in kinds.values():
+                return True # клавиатура вердикта
+            answers = [data for data, kind in kinds.items() if kind == 'answer']
+            backs = [data for data, kind in kinds.items() if kind == 'back']
+            if backs and rng.random() < self.back_rate:
+                kind, data = 'back', backs[0]
+            else:
+                kind, data = 'answer', rng.choice(answers)
+            reply = self.step(kind, chat_id, callback_update(chat_id, message_id, data), rng)
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=8, help="UPDATE_WORKERS бота")
+    parser.add_argument('--back-rate', type=float, default=0.1)
+    parser.add_argument('--duplicate-rate', type=float, default=0.0, help="доля нажатий с повтором и двойным нажатием")
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--global-rate', type=float, default=10000, help="OUTBOUND_GLOBAL_RATE бота")
+    parser.add_argument('--chat-rate', type=float, default=100, help="OUTBOUND_CHAT_RATE бота")
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    api = FakeBotAPI(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                     rate_limit_rate=args.rate_limit_rate, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix='bot-bench-')
+    os.environ.update({
+        'BOT_TOKEN': '0:benchmark',
+        'ADMIN_CHAT_ID': '-1',
+        'TELEGRAM_API_URL': api.api_url,
+        'UPDATE_WORKERS': str(args.workers),
+        'OUTBOUND_GLOBAL_RATE': str(args.global_rate),
+        'OUTBOUND_CHAT_RATE': str(args.chat_rate),
+        'NOTIFY_DB_PATH': os.path.join(workdir, 'notifications.db'),
+        'EVENT_LOG_PATH': os.path.join(workdir, 'events.log'),
+        'NOTIFY_WINDOW': '0.5',
+    })
+    from quizbot import runtime, telemetry
+    from dispatcher import attach_dispatcher
+    from telebot.types import Update
+    if args.workers > 0:
+        attach_dispatcher(runtime.bot, args.workers)
+    runtime.admin_notifier.start()
+
+    def process(payloads):
+        runtime.bot.process_new_updates([Update.de_json(payload) for payload in payloads])
+
+    harness = Harness(process, api.wait_reply, runtime.questionnaires.current, args.back_rate, args.timeout, args.seed,
+                      args.duplicate_rate)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(harness.run_user, range(1, args.users + 1)))
+    elapsed = time.perf_counter() - started
+    completed = sum(results)
+
+    print(f"Пользователей: {args.users}, завершили: {completed}, за {elapsed:.2f} с "
+          f"-> {completed / elapsed:.1f} завершений/с")
+    print(f"{'шаг':>12} {'n':>7} {'p50, мс':>9} {'p99, мс':>9}")
+    for kind in ('start', 'start_quiz', 'answer', 'back'):
+        values = harness.latencies.get(kind, [])
+        print(f"{kind:>12} {len(values):>7} {percentile(values, 0.5) * 1000:>9.1f} "
+              f"{percentile(values, 0.99) * 1000:>9.1f}")
+    print(f"Пиковый RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} МБ")
+    print(f"Вызовы API: {dict(api.calls)}, {sum(api.calls.values()) / max(completed, 1):.1f} на завершение; "
+          f"внедрено ошибок: {dict(api.injected)}")
+    print(f"Планировщик: {runtime.outbound.stats()}")
+    if telemetry.metrics.enabled:
+        print(f"Отсеяно обновлений: повторы {telemetry.DUPLICATE_UPDATES.value('repeat'):.0f}, "
+              f"устаревшие {telemetry.DUPLICATE_UPDATES.value('stale'):.0f}; "
+              f"не сделано вызовов API: {telemetry.OUTBOUND_SAVED.value():.0f}")
+
+
+if __name__ == '__main__':
+    main()
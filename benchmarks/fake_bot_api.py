@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""Локальная замена Telegram Bot API для нагрузочных прогонов.
+
+Понимает методы, которыми пользуется бот, с настраиваемой задержкой, долей ошибок
+и долей ответов 429. Бот подключается через TELEGRAM_API_URL=<FakeBotAPI.api_url>.
+
+Для многопроцессных прогонов сервер запускается в нескольких процессах на одном
+порту (SO_REUSEPORT, см. serve_process), а ответы бота приходят в RemoteReplies.
+getUpdates отдаёт обновления, переданные в updates (для прогонов в режиме polling).
+
+Отдельный запуск: python benchmarks/fake_bot_api.py --port 8081 --latency 0.05
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+from collections import Counter, defaultdict
+import itertools
+import json
+import queue
+import random
+import socket
+import sys
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+    reuse_port = False
+
+    def server_bind(self):
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def handle_error(self, request, client_address):
+        # Бот остановлен посреди запроса (cold_start.py) — это не ошибка сервера
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeBotAPI:
+    """HTTP-сервер, отвечающий как Bot API и запоминающий ответы бота по чатам."""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=1, seed=None, replies=None, reuse_port=False,
+                 message_ids=None, updates=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.injected = Counter()
+        self._random = random.Random(seed)
+        self._message_ids = message_ids or itertools.count(1)
+        self._replies = defaultdict(queue.Queue)
+        self._remote = replies # очередь процессов: ответы уходят туда, а не в wait_reply
+        self._updates = list(updates or ()) # обновления, которые отдаёт getUpdates
+        self._lock = threading.Lock()
+        self._httpd = _HTTPServer((host, port), self._make_handler(), bind_and_activate=False)
+        self._httpd.reuse_port = reuse_port
+        try:
+            self._httpd.server_bind()
+            self._httpd.server_activate()
+        except OSError:
+            self._httpd.server_close()
+            raise
+
+    @property
+    def api_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/bot{{0}}/{{1}}"
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, name="fake-bot-api", daemon=True).start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def wait_reply(self, chat_id, timeout=10.0):
+        """Следующее сообщение с клавиатурой, отправленное или отредактированное ботом в чате.
+
+        Возвращает (message_id, клавиатура) или None по таймауту.
+        """
+        try:
+            return self._replies[chat_id].get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _handle(self, method, params):
+        """Возвращает (HTTP-код, JSON ответа)."""
+        with self._lock:
+            self.calls[method] += 1
+            roll = self._random.random()
+        delay = self.latency + self.jitter * self._random.random()
+        if delay:
+            time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            self.injected['429'] += 1
+            return 429, {'ok': False, 'error_code': 429,
+                         'description': f"Too Many Requests: retry after {self.retry_after}",
+                         'parameters': {'retry_after': self.retry_after}}
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.injected['500'] += 1
+            return 500, {'ok': False, 'error_code': 500, 'description': "Internal Server Error"}
+
+        if method == 'getUpdates':
+            offset = int(params.get('offset') or 0)
+            pending = [update for update in self._updates if update['update_id'] >= offset]
+            if not pending:
+                time.sleep(min(float(params.get('timeout') or 0), 1.0))
+            return 200, {'ok': True, 'result': pending}
+        if method == 'getMe':
+            return 200, {'ok': True, 'result': {'id': 1, 'is_bot': True, 'first_name': 'Fake', 'username': 'fake_bot'}}
+        if method == 'getChat':
+            chat_id = int(params['chat_id'])
+            return 200, {'ok': True, 'result': {'id': chat_id, 'type': 'private',
+                                                'username': f"user{chat_id}", 'first_name': "Тест"}}
+        if method in ('sendMessage', 'editMessageText', 'editMessageReplyMarkup'):
+            chat_id = params['chat_id']
+            if method == 'sendMessage':
+                message_id = next(self._message_ids)
+            else:
+                message_id = int(params['message_id'])
+            markup = params.get('reply_markup')
+            if markup and chat_id.lstrip('-').isdigit():
+                if self._remote is not None:
+                    self._remote.put((int(chat_id), message_id, markup))
+                else:
+                    self._replies[int(chat_id)].put((message_id, json.loads(markup)))
+            return 200, {'ok': True, 'result': {
+                'message_id': message_id, 'date': int(time.time()),
+                'chat': {'id': int(chat_id) if chat_id.lstrip('-').isdigit() else 0, 'type': 'private'},
+                'text': params.get('text', '')}}
+        return 200, {'ok': True, 'result': True}
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True # иначе задержанный ACK добавляет ~40 мс на запрос
+
+            def _serve(self):
+                url = urlsplit(self.path)
+                params = dict(parse_qsl(url.query))
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    body = self.rfile.read(length)
+                    if self.headers.get('Content-Type', '').startswith('application/json'):
+                        params.update(json.loads(body))
+                    else:
+                        params.update(parse_qsl(body.decode('utf-8')))
+                status, payload = api._handle(url.path.rsplit('/', 1)[-1], params)
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def serve_process(port, index, processes, replies, options):
+    """Цель для multiprocessing: один из processes серверов на общем порту."""
+    api = FakeBotAPI(port=port, replies=replies, reuse_port=True,
+                     message_ids=itertools.count(index + 1, processes), **options)
+    api.serve_forever()
+
+
+class RemoteReplies:
+    """Ответы бота от серверов в других процессах, разобранные по чатам."""
+
+    def __init__(self, source):
+        self._source = source
+        self._replies = defaultdict(queue.Queue)
+        threading.Thread(target=self._run, name="fake-bot-api-replies", daemon=True).start()
+
+    def wait_reply(self, chat_id, timeout=10.0):
+        try:
+            return self._replies[chat_id].get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _run(self):
+        while True:
+            chat_id, message_id, markup = self._source.get()
+            self._replies[chat_id].put((message_id, json.loads(markup)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=int, default=1)
+    args = parser.parse_args()
+
+    api = FakeBotAPI(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                     args.rate_limit_rate, args.retry_after)
+    print(f"Fake Bot API: TELEGRAM_API_URL={api.api_url}")
+    api.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
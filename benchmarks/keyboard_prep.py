@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Микробенчмарк подготовки вопроса к отправке: сборка клавиатуры на лету против готового JSON.
+
+Запуск: python benchmarks/keyboard_prep.py [--rounds 2000]
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from telebot import apihelper
+from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from questionnaire import QUIZ_ID_PLACEHOLDER, load_questionnaire, make_callback_data, parse_definition
+
+PATH = os.path.join(ROOT, 'questionnaire.json')
+QUIZ = load_questionnaire(PATH)
+with open(PATH, 'rb') as f:
+    DEFINITION = parse_definition(f.read(), PATH)
+
+QUIZ_ID = 'deadbeef'
+
+
+def build_question_markup(q_index):
+    question = DEFINITION['questions'][q_index]
+    markup = InlineKeyboardMarkup(row_width=1)
+    markup.add(*[InlineKeyboardButton(answer['text'], callback_data=make_callback_data(f"a{q_index}.{opt_index}"))
+                 for opt_index, answer in enumerate(question['answers'])])
+    if q_index > 0:
+        markup.add(InlineKeyboardButton(DEFINITION['messages']['back_button'], callback_data=make_callback_data(f"b{q_index}")))
+    return markup
+
+
+def prepare_before(q_index):
+    # Прежний путь: новая разметка на каждый вызов и сериализация внутри telebot
+    markup = apihelper._convert_markup(build_question_markup(q_index))
+    return DEFINITION['questions'][q_index]['text'], markup.replace(QUIZ_ID_PLACEHOLDER, QUIZ_ID)
+
+
+def prepare_after(q_index):
+    text, markup_parts = QUIZ.question_payloads[q_index]
+    return text, apihelper._convert_markup(QUIZ_ID.join(markup_parts))
+
+
+def peak_bytes(func):
+    """Пиковый объём временных выделений памяти за подготовку всех вопросов."""
+    tracemalloc.start()
+    peak = 0
+    for q_index in range(len(QUIZ.questions)):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        func(q_index)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return peak
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    for q_index in range(len(QUIZ.questions)):
+        assert prepare_before(q_index) == prepare_after(q_index)
+
+    questions = len(QUIZ.questions)
+    for name, func in (('before', prepare_before), ('after', prepare_after)):
+        seconds = timeit.timeit(lambda: [func(i) for i in range(questions)], number=args.rounds)
+        per_call = seconds / (args.rounds * questions) * 1e6
+        print(f"{name:>7}: {per_call:8.2f} мкс на вопрос, "
+              f"пик выделений {peak_bytes(func)} байт")
+
+
+if __name__ == '__main__':
+    main_()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Прогон записанных обновлений через WebhookServer без выхода в сеть.
+
+Запуск: python benchmarks/webhook_replay.py [updates.jsonl] [--url http://127.0.0.1:8080/] [--secret s]
+Без файла генерируются синтетические нажатия на ответы текущего questionnaire.json
+в формате callback_data бота; без --url поднимается локальный WebhookServer,
+который только считает принятые обновления. У синтетических чатов нет сессий, поэтому
+настоящий бот ответит на такие нажатия как на устаревшие кнопки; для сквозного
+прохождения опроса есть e2e_throughput.py.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from questionnaire import load_questionnaire, make_callback_data
+from quizbot import config
+from webhook import SECRET_HEADER, WebhookServer
+
+
+def synthetic_updates(count, quiz):
+    actions = [action for action, route in quiz.routes.items() if route.kind == 'answer']
+    for update_id in range(1, count + 1):
+        chat = {'id': update_id % 500, 'type': 'private'}
+        user = {'id': update_id % 500, 'is_bot': False, 'first_name': 'Тест'}
+        data = make_callback_data(actions[update_id % len(actions)], format(chat['id'], 'x'))
+        yield {'update_id': update_id, 'callback_query': {
+            'id': str(update_id), 'chat_instance': 'replay', 'data': data, 'from': user,
+            'message': {'message_id': update_id, 'date': 0, 'chat': chat}}}
+
+
+def load_updates(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def post(url, secret, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'), method='POST',
+                                     headers={'Content-Type': 'application/json'})
+    if secret:
+        request.add_header(SECRET_HEADER, secret)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('updates', nargs='?', help="файл с обновлениями, по JSON на строку")
+    parser.add_argument('--url')
+    parser.add_argument('--secret', default='replay-secret')
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--connections', type=int, default=16)
+    args = parser.parse_args()
+
+    if args.updates:
+        updates = load_updates(args.updates)
+    else:
+        updates = list(synthetic_updates(args.count, load_questionnaire(config.QUESTIONNAIRE_PATH)))
+
+    server = None
+    processed = []
+    batches = []
+    lock = threading.Lock()
+    if args.url is None:
+        def process(batch):
+            with lock:
+                batches.append(len(batch))
+                processed.extend(batch)
+
+        server = WebhookServer(process, '127.0.0.1', 0, secret=args.secret)
+        server.start()
+        host, port = server.server_address[:2]
+        args.url = f"http://{host}:{port}/"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.connections) as pool:
+        statuses = list(pool.map(lambda payload: post(args.url, args.secret, payload), updates))
+    acked = time.perf_counter() - started
+    rejected = post(args.url, 'wrong-secret', updates[0])
+
+    print(f"Отправлено: {len(updates)}, ответов 200: {statuses.count(200)}, "
+          f"{len(updates) / acked:.0f} запросов/с")
+    print(f"Запрос с неверным секретом: HTTP {rejected}")
+    if server is not None:
+        server.join()
+        server.stop()
+        print(f"Обработано: {len(processed)} в {len(batches)} пачках (макс. {max(batches, default=0)})")
+
+
+if __name__ == '__main__':
+    main()
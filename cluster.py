@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Многопроцессный режим: один процесс принимает обновления, N процессов их обрабатывают.
+
+Обновления раскладываются по процессам по chat.id, поэтому сессии чата живут
+только в одном процессе и порядок обновлений чата сохраняется. Процесс-приёмник
+не разбирает JSON: в очередь воркера уходят пачки словарей как есть.
+"""
+import multiprocessing
+import os
+import queue
+import time
+
+from telebot import apihelper
+from telebot.types import Update
+
+from backoff import Backoff
+
+# Переменная окружения с номером воркера: задаётся до запуска процесса,
+# чтобы модуль бота при импорте выбрал свои файлы сессий, журнала и очереди
+SHARD_ENV = 'BOT_SHARD'
+
+_UPDATE_KINDS = ('message', 'edited_message', 'callback_query')
+
+
+def chat_id_of_payload(payload):
+    """id чата из JSON обновления; для прочих типов — update_id."""
+    for kind in _UPDATE_KINDS:
+        item = payload.get(kind)
+        if item is None:
+            continue
+        if kind == 'callback_query':
+            message = item.get('message')
+            return message['chat']['id'] if message else item['from']['id']
+        return item['chat']['id']
+    return payload['update_id']
+
+
+class ShardRouter:
+    """Процессы-воркеры и их очереди.
+
+    target(index, inbox, *args) выполняется в каждом процессе; упавший воркер
+    перезапускается при следующей раздаче обновлений.
+    """
+
+    def __init__(self, target, processes, args=(), queue_size=10000, context=None):
+        self.context = context or multiprocessing.get_context('spawn')
+        self._target = target
+        self._args = args
+        self._inboxes = [self.context.Queue(queue_size) for _ in range(processes)]
+        self._processes = [None] * processes
+
+    @property
+    def processes(self):
+        return len(self._inboxes)
+
+    def start(self):
+        for index in range(self.processes):
+            self._spawn(index)
+        return self
+
+    def dispatch(self, payloads):
+        """Раскладывает обновления (словари) по воркерам одной пачкой на воркер."""
+        batches = {}
+        for payload in payloads:
+            batches.setdefault(hash(chat_id_of_payload(payload)) % self.processes, []).append(payload)
+        for index, batch in batches.items():
+            if not self._processes[index].is_alive():
+                print(f"Воркер {index} завершился с кодом {self._processes[index].exitcode}, перезапускаю")
+                self._spawn(index)
+            self._inboxes[index].put(batch)
+
+    def signal(self, signum):
+        """Пересылает сигнал всем воркерам (например, SIGHUP для перезагрузки опросника)."""
+        for process in self._processes:
+            if process is not None and process.is_alive():
+                os.kill(process.pid, signum)
+
+    def stop(self, timeout=10):
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join(timeout)
+
+    def _spawn(self, index):
+        previous = os.environ.get(SHARD_ENV)
+        os.environ[SHARD_ENV] = str(index)
+        try:
+            process = self.context.Process(target=self._target, args=(index, self._inboxes[index]) + self._args,
+                                           name=f"shard-{index}", daemon=True)
+            process.start()
+        finally:
+            if previous is None:
+                del os.environ[SHARD_ENV]
+            else:
+                os.environ[SHARD_ENV] = previous
+        self._processes[index] = process
+
+
+def serve_shard(inbox, process):
+    """Цикл воркера: пачки обновлений из очереди -> process(список Update).
+
+    Завершается по None в очереди или если процесс-приёмник пропал.
+    """
+    parent = multiprocessing.parent_process()
+    while True:
+        try:
+            batch = inbox.get(timeout=1)
+        except queue.Empty:
+            if parent is not None and not parent.is_alive():
+                return
+            continue
+        if batch is None:
+            return
+        try:
+            process([Update.de_json(payload) for payload in batch])
+        except Exception as e:
+            print(f"Ошибка при обработке пачки обновлений: {e}")
+
+
+def poll_updates(token, dispatch, timeout=20, limit=100):
+    """Long polling в процессе-приёмнике: смещение двигается сразу после раздачи пачки."""
+    offset = None
+    backoff = Backoff()
+    while True:
+        try:
+            updates = apihelper.get_updates(token, offset=offset, limit=limit, timeout=timeout,
+                                            long_polling_timeout=timeout)
+        except Exception as e:
+            print(f"Ошибка получения обновлений: {e}")
+            time.sleep(backoff.next())
+            continue
+        backoff.reset()
+        if updates:
+            offset = updates[-1]['update_id'] + 1
+            dispatch(updates)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Отсев повторно доставленных обновлений: недавние ключи по каждому чату."""
+from collections import OrderedDict, deque
+import threading
+import time
+
+from sessions import evict_lru
+
+
+class RecentUpdates:
+    """Помнит последние per_chat ключей (id нажатия, id сообщения) каждого чата.
+
+    Память ограничена: не больше max_chats чатов, самые давние вытесняются,
+    а чат без новых ключей дольше ttl секунд забывается целиком.
+    """
+
+    def __init__(self, ttl=600, max_chats=100000, per_chat=16):
+        self.ttl = ttl
+        self.max_chats = max_chats
+        self.per_chat = per_chat
+        self._chats = OrderedDict() # chat_id -> (время последнего ключа, deque ключей)
+        self._lock = threading.Lock()
+
+    def seen(self, chat_id, key):
+        """True, если ключ уже встречался в чате; иначе запоминает его."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._chats.get(chat_id)
+            if item is not None and now - item[0] <= self.ttl:
+                keys = item[1]
+                if key in keys:
+                    return True
+            else:
+                keys = deque(maxlen=self.per_chat)
+            keys.append(key)
+            self._chats[chat_id] = (now, keys)
+            self._chats.move_to_end(chat_id)
+            evict_lru(self._chats, self.max_chats, self.ttl, now)
+            return False
+
+    def __len__(self):
+        return len(self._chats)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Параллельная обработка обновлений с сохранением порядка внутри одного чата."""
+import queue
+import threading
+
+
+def chat_id_of(update):
+    """Ключ упорядочивания: id чата, из которого пришло обновление."""
+    if update.message is not None:
+        return update.message.chat.id
+    callback = update.callback_query
+    if callback is not None:
+        if callback.message is not None:
+            return callback.message.chat.id
+        return callback.from_user.id
+    return update.update_id
+
+
+class ChatDispatcher:
+    """Пул воркеров, у каждого своя очередь.
+
+    Чат всегда попадает к одному и тому же воркеру, поэтому его обновления
+    обрабатываются строго по очереди, а разные чаты — параллельно.
+    """
+
+    def __init__(self, process, workers=4, queue_size=10000, key=chat_id_of):
+        self._process = process # callable(список обновлений)
+        self._key = key
+        self._queues = [queue.Queue(queue_size) for _ in range(workers)]
+        self._threads = [
+            threading.Thread(target=self._run, args=(q,), name=f"updates-{i}", daemon=True)
+            for i, q in enumerate(self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def workers(self):
+        return len(self._queues)
+
+    def dispatch(self, updates):
+        for update in updates:
+            self._queues[hash(self._key(update)) % len(self._queues)].put(update)
+
+    def join(self):
+        """Ждёт, пока все поставленные обновления будут обработаны."""
+        for q in self._queues:
+            q.join()
+
+    def stop(self):
+        for q in self._queues:
+            q.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self, q):
+        while True:
+            update = q.get()
+            try:
+                if update is None:
+                    return
+                # По одному: process_new_updates группирует пачку по типам и ломает порядок
+                self._process([update])
+            except Exception as e:
+                print(f"Ошибка при обработке обновления: {e}")
+            finally:
+                q.task_done()
+
+
+def attach_dispatcher(bot, workers):
+    """Подключает ChatDispatcher к циклу polling бота (бот должен быть создан с threaded=False)."""
+    dispatcher = ChatDispatcher(bot.process_new_updates, workers=workers)
+
+    def receive(updates):
+        # Смещение для getUpdates двигаем сразу, не дожидаясь обработки
+        for update in updates:
+            if update.update_id > bot.last_update_id:
+                bot.last_update_id = update.update_id
+        dispatcher.dispatch(updates)
+
+    bot.process_new_updates = receive
+    return dispatcher
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Журнал событий опроса: ответы, "Назад", старты и вердикты.
+
+Записи фиксированной длины дописываются в конец файла. Обработчики только кладут
+запись в буфер, фоновый поток раз в flush_interval секунд пишет накопленное и делает fsync.
+
+Выгрузка и аналитика читают журнал потоково через mmap, не загружая его целиком:
+    python eventlog.py stats events.log
+    python eventlog.py stats events.*.log # журналы процессов-обработчиков (BOT_PROCESSES > 1)
+    python eventlog.py export events.log --format csv --out events.csv
+    python eventlog.py export events.log --format columns --out events_columns/
+"""
+import argparse
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+# Время, chat_id, quiz_id, тип события, индекс вопроса, вариант ответа или номер вердикта
+RECORD = struct.Struct('<dqIBbbx')
+
+START = 1
+ANSWER = 2
+BACK = 3
+VERDICT = 4
+
+EVENT_NAMES = {START: 'start', ANSWER: 'answer', BACK: 'back', VERDICT: 'verdict'}
+COLUMNS = (('ts', 'd'), ('chat_id', 'q'), ('quiz_id', 'I'), ('event', 'B'), ('question', 'b'), ('value', 'b'))
+
+
+class EventLog:
+    """Буферизованная запись журнала с пакетным fsync."""
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._file = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def append(self, kind, chat_id, quiz_id, q_index=-1, value=-1):
+        record = RECORD.pack(time.time(), chat_id, quiz_id, kind, q_index, value)
+        with self._lock:
+            self._buffer += record
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                data, self._buffer = self._buffer, bytearray()
+            if not data:
+                return
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Ошибка записи журнала событий: {e}")
+
+
+class _NullEventLog:
+    def append(self, kind, chat_id, quiz_id, q_index=-1, value=-1):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def open_event_log(path, flush_interval=1.0):
+    """Журнал по пути path; пустой путь отключает запись."""
+    if not path:
+        return _NullEventLog()
+    return EventLog(path, flush_interval)
+
+
+def read_events(path, chunk_records=65536):
+    """Генератор записей журнала; недописанный хвост последней записи пропускается."""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        usable = size - size % RECORD.size
+        if usable == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            chunk = chunk_records * RECORD.size
+            for offset in range(0, usable, chunk):
+                yield from RECORD.iter_unpack(mm[offset:min(offset + chunk, usable)])
+
+
+def export_csv(path, out):
+    with open(out, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in COLUMNS])
+        for ts, chat_id, quiz_id, kind, q_index, value in read_events(path):
+            writer.writerow((f"{ts:.3f}", chat_id, quiz_id, EVENT_NAMES.get(kind, kind), q_index, value))
+
+
+def export_columns(path, out, chunk_records=65536):
+    """Колонки в отдельных файлах (сырые массивы little-endian) и schema.json с их типами."""
+    os.makedirs(out, exist_ok=True)
+    files = [open(os.path.join(out, f"{name}.bin"), 'wb') for name, _ in COLUMNS]
+    rows = 0
+    try:
+        columns = [array(code) for _, code in COLUMNS]
+        for record in read_events(path, chunk_records):
+            for column, value in zip(columns, record):
+                column.append(value)
+            rows += 1
+            if len(columns[0]) >= chunk_records:
+                _write_columns(columns, files)
+        _write_columns(columns, files)
+    finally:
+        for f in files:
+            f.close()
+    schema = {'rows': rows, 'byteorder': 'little',
+              'columns': [{'name': name, 'file': f"{name}.bin", 'type': code} for name, code in COLUMNS]}
+    with open(os.path.join(out, 'schema.json'), 'w', encoding='utf-8') as f:
+        json.dump(schema, f, indent=2)
+    return rows
+
+
+def _write_columns(columns, files):
+    for column, f in zip(columns, files):
+        if sys.byteorder != 'little':
+            column.byteswap()
+        column.tofile(f)
+        del column[:]
+
+
+def compute_stats(paths, max_open=100000):
+    """Распределение вердиктов, воронка по вопросам и таблица сопряжённости ответ x вердикт.
+
+    paths — путь или список путей; чат пишет только в журнал своего процесса,
+    поэтому журналы можно читать подряд. Ответы незавершённых прохождений
+    держатся не более чем для max_open прохождений.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    verdicts = Counter()
+    answers = Counter()
+    backs = Counter()
+    starts = 0
+    crosstab = defaultdict(Counter) # (вопрос, вариант) -> Counter вердиктов
+    open_quizzes = OrderedDict() # (chat_id, quiz_id) -> {вопрос: вариант}
+    records = (record for path in paths for record in read_events(path))
+    for _, chat_id, quiz_id, kind, q_index, value in records:
+        key = (chat_id, quiz_id)
+        if kind == START:
+            starts += 1
+        elif kind == ANSWER:
+            answers[q_index] += 1
+            quiz = open_quizzes.pop(key, None) or {}
+            quiz[q_index] = value
+            open_quizzes[key] = quiz
+            if len(open_quizzes) > max_open:
+                open_quizzes.popitem(last=False)
+        elif kind == BACK:
+            backs[q_index] += 1
+        elif kind == VERDICT:
+            verdicts[value] += 1
+            for answer in (open_quizzes.pop(key, None) or {}).items():
+                crosstab[answer][value] += 1
+    return {'starts': starts, 'verdicts': verdicts, 'answers': answers, 'backs': backs, 'crosstab': crosstab}
+
+
+def print_stats(stats, out=sys.stdout):
+    total = sum(stats['verdicts'].values())
+    print(f"Стартов: {stats['starts']}, вердиктов: {total}", file=out)
+    print("\nВердикты:", file=out)
+    for verdict, count in sorted(stats['verdicts'].items()):
+        print(f"  verdikt{verdict}: {count} ({count / total:.1%})", file=out)
+    print("\nВопрос: ответов / нажатий \"Назад\"", file=out)
+    for q_index in sorted(stats['answers']):
+        print(f"  q{q_index + 1}: {stats['answers'][q_index]} / {stats['backs'][q_index]}", file=out)
+    verdict_columns = sorted(stats['verdicts'])
+    print("\nОтвет x вердикт:", file=out)
+    print("  " + f"{'ответ':<12}" + ''.join(f"{'verdikt' + str(v):>10}" for v in verdict_columns), file=out)
+    for (q_index, opt_index), counts in sorted(stats['crosstab'].items()):
+        label = f"q{q_index + 1}_opt{opt_index + 1}"
+        print("  " + f"{label:<12}" + ''.join(f"{counts[v]:>10}" for v in verdict_columns), file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Выгрузка и аналитика журнала событий опроса")
+    commands = parser.add_subparsers(dest='command', required=True)
+    stats_parser = commands.add_parser('stats', help="вердикты, воронка и таблица ответ x вердикт")
+    stats_parser.add_argument('path', nargs='+')
+    stats_parser.add_argument('--max-open', type=int, default=100000)
+    export_parser = commands.add_parser('export', help="выгрузка в CSV или по колонкам")
+    export_parser.add_argument('path')
+    export_parser.add_argument('--format', choices=('csv', 'columns'), default='csv')
+    export_parser.add_argument('--out', required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == 'stats':
+        print_stats(compute_stats(args.path, args.max_open))
+    elif args.format == 'csv':
+        export_csv(args.path, args.out)
+    else:
+        rows = export_columns(args.path, args.out)
+        print(f"Выгружено записей: {rows}")
+
+
+if __name__ == '__main__':
+    main()
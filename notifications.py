@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Фоновая отправка уведомлений администратору: очередь на диске, дайджесты и лимит частоты."""
+import json
+import sqlite3
+import threading
+import time
+
+from backoff import Backoff
+from questionnaire import MAX_MESSAGE_LENGTH
+from ratelimit import TokenBucket
+
+# Ошибки Bot API, которые повтор не исправит: неверный запрос, бот заблокирован или удалён из чата
+PERMANENT_ERROR_CODES = frozenset({400, 403})
+
+
+def is_permanent(error):
+    return getattr(error, 'error_code', None) in PERMANENT_ERROR_CODES
+
+
+class NotificationQueue:
+    """Очередь заявок в SQLite: заявка удаляется только после успешной отправки.
+
+    Заявки, которые отправить невозможно, переносятся в таблицу failed_leads для разбора вручную.
+    """
+
+    def __init__(self, path='notifications.db'):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Подключаемся лениво, чтобы импорт бота не создавал файл очереди
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS leads ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, created REAL NOT NULL)')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS failed_leads ('
+                'id INTEGER PRIMARY KEY, payload TEXT NOT NULL, created REAL NOT NULL, failed REAL NOT NULL, '
+                'error TEXT NOT NULL)')
+        return self._conn
+
+    def put(self, lead):
+        with self._lock:
+            self._connection().execute('INSERT INTO leads (payload, created) VALUES (?, ?)',
+                                       (json.dumps(lead, ensure_ascii=False), time.time()))
+
+    def peek(self, limit=50):
+        """Самые старые заявки: [(id, заявка, время постановки)]."""
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT id, payload, created FROM leads ORDER BY id LIMIT ?', (limit,)).fetchall()
+        return [(row_id, json.loads(payload), created) for row_id, payload, created in rows]
+
+    def remove(self, ids):
+        with self._lock:
+            self._connection().executemany('DELETE FROM leads WHERE id = ?', [(row_id,) for row_id in ids])
+
+    def set_aside(self, ids, error):
+        """Переносит заявки из очереди в failed_leads."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN')
+            try:
+                for row_id in ids:
+                    conn.execute('INSERT OR REPLACE INTO failed_leads (id, payload, created, failed, error) '
+                                 'SELECT id, payload, created, ?, ? FROM leads WHERE id = ?', (time.time(), error, row_id))
+                    conn.execute('DELETE FROM leads WHERE id = ?', (row_id,))
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def failed(self):
+        """Отложенные заявки: [(id, заявка, текст ошибки)]."""
+        with self._lock:
+            rows = self._connection().execute('SELECT id, payload, error FROM failed_leads ORDER BY id').fetchall()
+        return [(row_id, json.loads(payload), error) for row_id, payload, error in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM leads').fetchone()[0]
+
+
+class AdminNotifier:
+    """Фоновый поток, который разбирает очередь заявок.
+
+    Заявки, пришедшие в пределах window секунд, склеиваются в один дайджест
+    (не длиннее MAX_MESSAGE_LENGTH). Частоту сообщений ограничивает ведро токенов,
+    при ошибке отправка повторяется с экспоненциальной задержкой. Если повтор не поможет
+    (400/403 от Bot API), заявки дайджеста откладываются в сторону и не держат очередь.
+    """
+
+    def __init__(self, render, send, queue, window=5.0, per_minute=20, batch_size=50, failures=None):
+        self._render = render # заявка -> текст
+        self._send = send # текст -> отправка в чат администратора
+        self._failures = failures # счётчик неудачных отправок
+        self.queue = queue
+        self.window = window
+        self.batch_size = batch_size
+        self._bucket = TokenBucket(per_minute / 60.0, capacity=3)
+        self._backoff = Backoff(base=1.0, cap=300.0)
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def notify(self, lead):
+        """Ставит заявку в очередь; не блокирует обработчик пользователя."""
+        self.queue.put(lead)
+        self._wakeup.set()
+
+    def start(self):
+        # Оставшиеся с прошлого запуска заявки будут отправлены первыми
+        self._thread = threading.Thread(target=self._run, name="admin-notifier", daemon=True)
+        self._thread.start()
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while not self._stopped.is_set():
+                pending = self.queue.peek(self.batch_size)
+                if not pending:
+                    break
+                # Ждём окончания окна, чтобы собрать соседние заявки в один дайджест
+                delay = pending[0][2] + self.window - time.time()
+                if delay > 0 and len(pending) < self.batch_size:
+                    self._stopped.wait(delay)
+                    pending = self.queue.peek(self.batch_size)
+                if not self._deliver(pending):
+                    self._stopped.wait(self._backoff.next())
+
+    def _deliver(self, pending):
+        rendered = []
+        for row_id, lead, _ in pending:
+            try:
+                rendered.append((row_id, self._render(lead)))
+            except Exception as e:
+                # Заявка остаётся в очереди и будет сформирована заново, остальные отправляются
+                print(f"Ошибка при формировании заявки админу: {e}")
+                if self._failures is not None:
+                    self._failures.inc()
+        for ids, text in self._digests(rendered):
+            self._bucket.acquire()
+            try:
+                self._send(text)
+            except Exception as e:
+                print(f"Ошибка при отправке админу: {e}")
+                if self._failures is not None:
+                    self._failures.inc()
+                if is_permanent(e):
+                    self.queue.set_aside(ids, str(e))
+                    continue
+                return False
+            self.queue.remove(ids)
+            self._backoff.reset()
+        return len(rendered) == len(pending)
+
+    def _digests(self, rendered):
+        ids, parts, length = [], [], 0
+        for row_id, text in rendered:
+            if parts and length + len(text) + 2 > MAX_MESSAGE_LENGTH:
+                yield ids, '\n\n'.join(parts)
+                ids, parts, length = [], [], 0
+            ids.append(row_id)
+            parts.append(text)
+            length += len(text) + 2
+        if parts:
+            yield ids, '\n\n'.join(parts)
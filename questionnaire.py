@@ -0,0 +1,444 @@
+# -*- coding: utf-8 -*-
+"""Опросник из внешнего файла: вопросы, вердикты, правила подсчёта и тексты.
+
+Файл (JSON или YAML) проверяется и компилируется в неизменяемый Questionnaire:
+готовые клавиатуры, таблицу маршрутов нажатий, веса вердиктов и шаблон досье.
+QuestionnaireRegistry перечитывает файл при изменении или по SIGHUP и атомарно
+подменяет текущую версию; начатые прохождения доигрываются на своей версии.
+"""
+from collections import OrderedDict, namedtuple
+import json
+import os
+import threading
+from types import MappingProxyType
+import zlib
+
+# Ограничение Telegram на длину одного сообщения
+MAX_MESSAGE_LENGTH = 4096
+
+# callback_data: "<версия формата>:<id прохождения>:<действие>", не длиннее 64 байт
+CALLBACK_VERSION = '1'
+QUIZ_ID_PLACEHOLDER = '{quiz_id}'
+
+# Индексы вопросов и вариантов хранятся в сессии и журнале событий как знаковый байт
+MAX_QUESTIONS = 127
+MAX_OPTIONS = 127
+
+# Действия кнопок вердикта, которые бот обрабатывает сам
+VERDICT_ACTIONS = frozenset({'thanks'})
+
+MESSAGE_KEYS = ('finished', 'incomplete', 'stale_button', 'thanks', 'back_button')
+
+# Запись маршрута: kind — тип нажатия; next_index — следующий вопрос (None — пора подводить итог)
+Route = namedtuple('Route', 'kind q_index opt_index question next_index progress_text')
+
+# number — номер вердикта в журнале событий (по порядку в файле, с 1)
+Verdict = namedtuple('Verdict', 'key number name text markup escaped_name')
+
+
+def make_callback_data(action, quiz_id=QUIZ_ID_PLACEHOLDER):
+    return f"{CALLBACK_VERSION}:{quiz_id}:{action}"
+
+
+def parse_callback(data):
+    """Возвращает (id прохождения, действие); для чужих и устаревших форматов — (None, None)."""
+    parts = data.split(':', 2)
+    if len(parts) != 3 or parts[0] != CALLBACK_VERSION:
+        return None, None
+    return parts[1], parts[2]
+
+
+def compile_markup(rows):
+    """JSON inline-клавиатуры из рядов кнопок, разрезанный по месту id прохождения: quiz_id.join(части).
+
+    Сериализуется так же, как InlineKeyboardMarkup.to_json в telebot; сам telebot
+    не импортируется, чтобы модуль подключался быстро и без зависимостей бота.
+    """
+    return tuple(json.dumps({'inline_keyboard': rows}).split(QUIZ_ID_PLACEHOLDER))
+
+
+def _callback_button(text, action):
+    return {'text': text, 'callback_data': make_callback_data(action)}
+
+
+_MARKDOWN_V2_ESCAPES = str.maketrans({char: '\\' + char for char in '\\_*[]()~`>#+-=|{}.!'})
+
+
+def escape_markdown_v2(text: str) -> str:
+    """Экранирует символы для MarkdownV2."""
+    return text.translate(_MARKDOWN_V2_ESCAPES)
+
+
+# --- Проверка описания ---
+
+def _check_text(value, where, errors, limit=MAX_MESSAGE_LENGTH):
+    if not isinstance(value, str) or not value.strip():
+        errors.append(f"{where}: нужен непустой текст")
+    elif len(value) > limit:
+        errors.append(f"{where}: текст длиннее {limit} символов")
+
+
+def _check_list(value, where, errors):
+    if not isinstance(value, list) or not value:
+        errors.append(f"{where}: нужен непустой список")
+        return []
+    return value
+
+
+def _check_object(value, where, errors):
+    if not isinstance(value, dict):
+        errors.append(f"{where}: нужен объект")
+        return {}
+    return value
+
+
+def _check_unique(value, seen, where, errors):
+    if not isinstance(value, str) or not value:
+        errors.append(f"{where}: нужна непустая строка")
+    elif value in seen:
+        errors.append(f"{where}: повтор '{value}'")
+    else:
+        seen.add(value)
+
+
+def validate_definition(definition):
+    """Список ошибок в описании опросника; пустой список — описание корректно."""
+    errors = []
+    definition = _check_object(definition, "описание", errors)
+
+    welcome = _check_object(definition.get('welcome'), "welcome", errors)
+    _check_text(welcome.get('text'), "welcome.text", errors)
+    _check_text(welcome.get('button'), "welcome.button", errors)
+
+    messages = _check_object(definition.get('messages'), "messages", errors)
+    for key in MESSAGE_KEYS:
+        _check_text(messages.get(key), f"messages.{key}", errors)
+
+    question_codes, question_keys, answer_codes = set(), set(), set()
+    questions = _check_list(definition.get('questions'), "questions", errors)
+    if len(questions) > MAX_QUESTIONS:
+        errors.append(f"questions: больше {MAX_QUESTIONS} вопросов")
+    for q_index, question in enumerate(questions):
+        where = f"questions[{q_index}]"
+        question = _check_object(question, where, errors)
+        _check_unique(question.get('code'), question_codes, f"{where}.code", errors)
+        _check_unique(question.get('key'), question_keys, f"{where}.key", errors)
+        _check_text(question.get('text'), f"{where}.text", errors)
+        if 'progress' in question:
+            _check_text(question['progress'], f"{where}.progress", errors)
+        answers = _check_list(question.get('answers'), f"{where}.answers", errors)
+        if len(answers) > MAX_OPTIONS:
+            errors.append(f"{where}.answers: больше {MAX_OPTIONS} вариантов")
+        for opt_index, answer in enumerate(answers):
+            answer = _check_object(answer, f"{where}.answers[{opt_index}]", errors)
+            _check_unique(answer.get('code'), answer_codes, f"{where}.answers[{opt_index}].code", errors)
+            _check_text(answer.get('text'), f"{where}.answers[{opt_index}].text", errors)
+
+    verdict_keys = set()
+    for index, verdict in enumerate(_check_list(definition.get('verdicts'), "verdicts", errors)):
+        where = f"verdicts[{index}]"
+        verdict = _check_object(verdict, where, errors)
+        _check_unique(verdict.get('key'), verdict_keys, f"{where}.key", errors)
+        _check_text(verdict.get('name'), f"{where}.name", errors)
+        _check_text(verdict.get('text'), f"{where}.text", errors)
+        button = _check_object(verdict.get('button'), f"{where}.button", errors)
+        _check_text(button.get('text'), f"{where}.button.text", errors)
+        if ('url' in button) == ('action' in button):
+            errors.append(f"{where}.button: нужен ровно один из url и action")
+        elif 'action' in button and button['action'] not in VERDICT_ACTIONS:
+            errors.append(f"{where}.button.action: неизвестное действие '{button['action']}'")
+        elif 'url' in button:
+            _check_text(button['url'], f"{where}.button.url", errors)
+
+    def check_verdict(key, where):
+        if key not in verdict_keys:
+            errors.append(f"{where}: неизвестный вердикт '{key}'")
+
+    def check_answers(codes, where):
+        for code in _check_list(codes, where, errors):
+            if code not in answer_codes:
+                errors.append(f"{where}: неизвестный ответ '{code}'")
+
+    scoring = _check_object(definition.get('scoring'), "scoring", errors)
+    priority = _check_list(scoring.get('priority'), "scoring.priority", errors)
+    for key in priority:
+        check_verdict(key, "scoring.priority")
+    if len(set(priority)) != len(priority):
+        errors.append("scoring.priority: вердикты повторяются")
+    check_verdict(scoring.get('default'), "scoring.default")
+    no_tracking = _check_object(scoring.get('no_tracking'), "scoring.no_tracking", errors)
+    check_verdict(no_tracking.get('verdict'), "scoring.no_tracking.verdict")
+    check_answers(no_tracking.get('answers'), "scoring.no_tracking.answers")
+    for index, rule in enumerate(_check_list(scoring.get('rules'), "scoring.rules", errors)):
+        where = f"scoring.rules[{index}]"
+        rule = _check_object(rule, where, errors)
+        if rule.get('verdict') not in priority:
+            errors.append(f"{where}.verdict: вердикт '{rule.get('verdict')}' не указан в scoring.priority")
+        check_answers(rule.get('answers'), f"{where}.answers")
+        if not isinstance(rule.get('points'), int) or isinstance(rule.get('points'), bool):
+            errors.append(f"{where}.points: нужно целое число")
+
+    dossier = _check_object(definition.get('dossier'), "dossier", errors)
+    _check_text(dossier.get('title'), "dossier.title", errors)
+    _check_text(dossier.get('not_answered'), "dossier.not_answered", errors)
+    for index, section in enumerate(_check_list(dossier.get('sections'), "dossier.sections", errors)):
+        where = f"dossier.sections[{index}]"
+        section = _check_object(section, where, errors)
+        _check_text(section.get('name'), f"{where}.name", errors)
+        for item_index, item in enumerate(_check_list(section.get('items'), f"{where}.items", errors)):
+            item = _check_object(item, f"{where}.items[{item_index}]", errors)
+            _check_text(item.get('label'), f"{where}.items[{item_index}].label", errors)
+            if item.get('question') not in question_keys:
+                errors.append(f"{where}.items[{item_index}].question: неизвестный вопрос '{item.get('question')}'")
+    return errors
+
+
+# --- Скомпилированная версия ---
+
+class Questionnaire:
+    """Неизменяемая версия опросника со всеми заранее подготовленными структурами."""
+
+    def __init__(self, definition, version=0, source=None):
+        errors = validate_definition(definition)
+        if errors:
+            raise ValueError("Ошибки в описании опросника:\n  " + "\n  ".join(errors))
+        self.version = version
+        self.source = source
+        questions = definition['questions']
+        messages = definition['messages']
+        self.questions = tuple(question['code'] for question in questions)
+        self.messages = MappingProxyType({key: messages[key] for key in MESSAGE_KEYS})
+        self.welcome_text = definition['welcome']['text']
+
+        # Код ответа -> (индекс вопроса, индекс варианта)
+        self.answer_index = MappingProxyType({
+            answer['code']: (q_index, opt_index)
+            for q_index, question in enumerate(questions)
+            for opt_index, answer in enumerate(question['answers'])
+        })
+        self.question_index = MappingProxyType({question['key']: q_index for q_index, question in enumerate(questions)})
+        # Тексты вариантов по индексу вопроса и варианта
+        self.answer_labels = tuple(tuple(answer['text'] for answer in question['answers']) for question in questions)
+        # Число вариантов каждого вопроса: по нему проверяются сессии чужих версий
+        self.shape = tuple(len(labels) for labels in self.answer_labels)
+
+        self._compile_scoring(definition['scoring'])
+        self._compile_routes(questions)
+        self._compile_keyboards(definition)
+        self._compile_dossier(definition['dossier'])
+
+    def fits(self, answers):
+        """Ответы сессии (байт на вопрос, индекс варианта + 1) допустимы для этой версии."""
+        return len(answers) == len(self.shape) and all(value <= options for value, options in zip(answers, self.shape))
+
+    # Правила привязаны к кодам ответов, а не к их текстам: правка формулировок не ломает подсчёт
+    def _compile_scoring(self, scoring):
+        self.priority = tuple(scoring['priority'])
+        self.default_verdict = scoring['default']
+        self.no_tracking_verdict = scoring['no_tracking']['verdict']
+        # "Трекинг не нужен": все ответы должны совпасть
+        self.no_tracking_mask = tuple(self.answer_index[code] for code in scoring['no_tracking']['answers'])
+        # [вопрос][вариант] -> баллы по порядку priority
+        weights = [[[0] * len(self.priority) for _ in labels] for labels in self.answer_labels]
+        for rule in scoring['rules']:
+            column = self.priority.index(rule['verdict'])
+            for code in rule['answers']:
+                q_index, opt_index = self.answer_index[code]
+                weights[q_index][opt_index][column] += rule['points']
+        self.weights = tuple(tuple(tuple(option) for option in question) for question in weights)
+
+    def _compile_routes(self, questions):
+        """Действие из callback_data -> Route."""
+        routes = {
+            'start': Route('start_quiz', None, None, None, 0, None),
+            'thanks': Route('feedback_thanks', None, None, None, None, None),
+        }
+        for q_index, question in enumerate(questions):
+            next_index = q_index + 1 if q_index + 1 < len(questions) else None
+            for opt_index in range(len(question['answers'])):
+                routes[f"a{q_index}.{opt_index}"] = Route(
+                    'answer', q_index, opt_index, question['code'], next_index, question.get('progress'))
+            if q_index > 0:
+                routes[f"b{q_index}"] = Route('back', q_index, None, question['code'], q_index - 1, None)
+        self.routes = MappingProxyType(routes)
+
+    # Разметка каждого сообщения собирается и сериализуется в JSON один раз при компиляции;
+    # telebot передаёт готовую строку в API как есть
+    def _compile_keyboards(self, definition):
+        payloads = []
+        for q_index, question in enumerate(definition['questions']):
+            # По кнопке в ряд
+            rows = [[_callback_button(answer['text'], f"a{q_index}.{opt_index}")]
+                    for opt_index, answer in enumerate(question['answers'])]
+            if q_index > 0:
+                rows.append([_callback_button(self.messages['back_button'], f"b{q_index}")])
+            payloads.append((question['text'], compile_markup(rows)))
+        # (текст вопроса, части JSON клавиатуры) по индексу вопроса
+        self.question_payloads = tuple(payloads)
+
+        verdicts = {}
+        for number, verdict in enumerate(definition['verdicts'], start=1):
+            button = verdict['button']
+            if 'action' in button:
+                rows = [[_callback_button(button['text'], button['action'])]]
+            else:
+                rows = [[{'text': button['text'], 'url': button['url']}]]
+            verdicts[verdict['key']] = Verdict(verdict['key'], number, verdict['name'], verdict['text'],
+                                               compile_markup(rows), escape_markdown_v2(verdict['name']))
+        self.verdicts = MappingProxyType(verdicts)
+        self.verdicts_by_name = MappingProxyType({verdict.name: verdict for verdict in verdicts.values()})
+
+        self.welcome_markup = compile_markup([[_callback_button(definition['welcome']['button'], 'start')]])
+
+    def _compile_dossier(self, dossier):
+        """Шаблон досье: [(готовый префикс пункта, индекс вопроса)] и хвост."""
+        # Набор ответов конечен, поэтому экранированные тексты вариантов готовятся заранее
+        self.escaped_answer_labels = tuple(tuple(map(escape_markdown_v2, labels)) for labels in self.answer_labels)
+        self.escaped_not_answered = escape_markdown_v2(dossier['not_answered'])
+        items = []
+        pending = f"*{escape_markdown_v2(dossier['title'])}*\n"
+        for section in dossier['sections']:
+            pending += f"\n*{escape_markdown_v2(section['name'])}:*\n"
+            for item in section['items']:
+                items.append((pending + f"• {escape_markdown_v2(item['label'])}: _", self.question_index[item['question']]))
+                pending = "_\n"
+        self.dossier_items = tuple(items)
+        self.dossier_tail = pending
+
+    def answers_to_indexes(self, data):
+        """Переводит ответы {key вопроса: код ответа} в индексы вариантов по порядку вопросов."""
+        return tuple(self.answer_index[data[key]][1] for key in self.question_index)
+
+    def score(self, indexes):
+        """Определяет вердикт по индексам вариантов (по одному на вопрос)."""
+        for q_index, opt_index in self.no_tracking_mask:
+            if indexes[q_index] != opt_index:
+                break
+        else:
+            return self.no_tracking_verdict
+
+        totals = [sum(column) for column in zip(*map(tuple.__getitem__, self.weights, indexes))]
+        max_score = max(totals)
+        if max_score == 0: # Если никаких проблем не найдено, но запрос на рост есть
+            return self.default_verdict
+        # Первый по приоритету среди лидеров
+        return self.priority[totals.index(max_score)]
+
+    def score_batch(self, rows):
+        """Пересчитывает вердикты для набора сохранённых анкет (например, после смены правил)."""
+        return list(map(self.score, rows))
+
+    def render_dossier(self, answers):
+        """Досье в MarkdownV2 по индексам вариантов (-1 — нет ответа)."""
+        parts = []
+        labels = self.escaped_answer_labels
+        for prefix, q_index in self.dossier_items:
+            opt_index = answers[q_index] if q_index < len(answers) else -1
+            parts.append(prefix)
+            parts.append(labels[q_index][opt_index] if 0 <= opt_index < len(labels[q_index]) else self.escaped_not_answered)
+        parts.append(self.dossier_tail)
+        return ''.join(parts)
+
+
+def parse_definition(raw, path=''):
+    """Разбирает содержимое файла: YAML по расширению .yaml/.yml, иначе JSON."""
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Для описания опросника в YAML нужен пакет PyYAML")
+        try:
+            return yaml.safe_load(raw)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Некорректный YAML: {e}")
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"Некорректный JSON: {e}")
+
+
+def load_questionnaire(path):
+    """Читает, проверяет и компилирует файл; версия — контрольная сумма его содержимого."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return Questionnaire(parse_definition(raw, path), version=zlib.crc32(raw), source=path)
+
+
+# --- Горячая перезагрузка ---
+
+class QuestionnaireRegistry:
+    """Текущая версия опросника и несколько предыдущих для начатых прохождений."""
+
+    def __init__(self, path, keep=8):
+        self.path = path
+        self.keep = keep
+        self.current = None
+        self._versions = OrderedDict() # версия -> Questionnaire
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._reload_requested = threading.Event()
+        self._thread = None
+        self.reload()
+
+    def get(self, version):
+        return self._versions.get(version)
+
+    def for_session(self, session):
+        """Версия, на которой начато прохождение.
+
+        Если её уже нет в памяти (перезапуск, вытеснение), подходит текущая версия,
+        если сохранённые ответы укладываются в её вопросы и варианты; иначе None —
+        прохождение придётся начать заново.
+        """
+        quiz = self._versions.get(session.version)
+        if quiz is None:
+            current = self.current
+            if current.fits(session.answers):
+                return current
+        return quiz
+
+    def reload(self):
+        """Перечитывает файл; True, если загружена новая версия.
+
+        Ошибка чтения или проверки пробрасывается, текущая версия при этом не меняется.
+        """
+        with self._lock:
+            self._stamp = self._file_stamp()
+            quiz = load_questionnaire(self.path)
+            if self.current is not None and quiz.version == self.current.version:
+                return False
+            self._versions.pop(quiz.version, None)
+            self._versions[quiz.version] = quiz
+            while len(self._versions) > self.keep:
+                self._versions.popitem(last=False)
+            self.current = quiz
+            return True
+
+    def request_reload(self):
+        """Внеочередная перезагрузка в фоновом потоке; безопасно вызывать из обработчика сигнала."""
+        self._reload_requested.set()
+
+    def watch(self, interval=5.0):
+        """Запускает фоновую проверку файла раз в interval секунд (0 — только по request_reload)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="questionnaire-watch", daemon=True)
+            self._thread.start()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _run(self, interval):
+        while True:
+            forced = self._reload_requested.wait(interval or None)
+            self._reload_requested.clear()
+            if not forced and self._file_stamp() == self._stamp:
+                continue
+            try:
+                if self.reload():
+                    print(f"Опросник обновлён: версия {self.current.version:08x}")
+            except (OSError, ValueError) as e:
+                print(f"Опросник не обновлён, остаётся версия {self.current.version:08x}: {e}")
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""Бот диагностики бизнеса.
+
+Импорт пакета ничего не создаёт: бот, планировщик и хранилища собираются при
+первом обращении к quizbot.runtime. Подсчёт вердиктов и сборка досье
+(questionnaire.Questionnaire) доступны без BOT_TOKEN и без telebot.
+
+Запуск: python main.py [--profile-startup]
+"""
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Запуск бота: polling, webhook или многопроцессный режим."""
+import argparse
+import atexit
+import os
+import signal
+import sys
+import time
+
+from backoff import Backoff
+
+from quizbot import config, runtime
+from quizbot.telemetry import metrics
+
+
+def run_polling():
+    backoff = Backoff()
+    while True:
+        started = time.monotonic()
+        try:
+            print("Бот запущен...")
+            runtime.bot.polling(none_stop=True)
+        except Exception as e:
+            print(f"Критическая ошибка в цикле polling: {e}")
+            if time.monotonic() - started > backoff.cap:
+                backoff.reset()
+            time.sleep(backoff.next())
+
+
+def run_webhook(process=None, parse=True):
+    from webhook import WebhookServer
+    config.require_webhook_secret()
+    server = WebhookServer(process or runtime.bot.process_new_updates, config.WEBHOOK_HOST, config.WEBHOOK_PORT,
+                           secret=config.WEBHOOK_SECRET, parse=parse)
+    if config.WEBHOOK_URL:
+        from telebot import apihelper
+        backoff = Backoff()
+        while True:
+            try:
+                apihelper.set_webhook(config.BOT_TOKEN, url=config.WEBHOOK_URL, secret_token=config.WEBHOOK_SECRET)
+                break
+            except Exception as e:
+                print(f"Не удалось зарегистрировать webhook: {e}")
+                time.sleep(backoff.next())
+    print(f"Бот запущен (webhook на порту {config.WEBHOOK_PORT})...")
+    server.serve_forever()
+
+
+def start_services():
+    """Фоновые службы процесса, который обрабатывает обновления."""
+    from dispatcher import attach_dispatcher
+    bot = runtime.bot
+    atexit.register(runtime.events.close)
+    questionnaires = runtime.questionnaires
+    questionnaires.watch(config.QUESTIONNAIRE_RELOAD)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: questionnaires.request_reload())
+    if metrics.enabled:
+        metrics.serve(config.METRICS_HOST, config.METRICS_PORT + int(config.BOT_SHARD or 0))
+    runtime.admin_notifier.start()
+    if config.UPDATE_WORKERS > 0:
+        return attach_dispatcher(bot, config.UPDATE_WORKERS)
+
+
+def run_shard(index, inbox, outbound_limit):
+    """Процесс-обработчик многопроцессного режима: свои чаты, общий лимит исходящих."""
+    import cluster
+    runtime.outbound.global_limit = outbound_limit
+    dispatcher = start_services()
+    print(f"Обработчик {index} запущен (pid {os.getpid()})")
+    cluster.serve_shard(inbox, runtime.bot.process_new_updates)
+    # Остановка: дорабатываем принятые обновления, неотправленные заявки остаются в очереди
+    if dispatcher is not None:
+        dispatcher.join()
+    runtime.admin_notifier.stop()
+
+
+def run_cluster():
+    import cluster
+    from ratelimit import SharedTokenBucket
+    config.require_credentials()
+    runtime.configure_api()
+    # Лимит бота ~30 сообщений в секунду один на все процессы
+    router = cluster.ShardRouter(run_shard, config.BOT_PROCESSES,
+                                 args=(SharedTokenBucket(config.OUTBOUND_GLOBAL_RATE),))
+    router.start()
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, lambda signum, frame: router.signal(signal.SIGHUP))
+    # docker stop: обработчики дорабатывают принятые обновления
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Приёмник обновлений запущен, процессов-обработчиков: {config.BOT_PROCESSES}")
+    try:
+        if config.BOT_MODE == 'webhook':
+            run_webhook(router.dispatch, parse=False)
+        else:
+            cluster.poll_updates(config.BOT_TOKEN, router.dispatch)
+    finally:
+        router.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бот диагностики бизнеса")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="собрать всё, что нужно для первого обновления, вывести время этапов и импортов и выйти")
+    args = parser.parse_args(argv)
+
+    if config.BOT_MODE == 'webhook' and not args.profile_startup:
+        config.require_webhook_secret()
+
+    if args.profile_startup:
+        from quizbot import startup
+        startup.profile()
+    elif config.BOT_PROCESSES > 1:
+        run_cluster()
+    else:
+        start_services()
+        if config.BOT_MODE == 'webhook':
+            run_webhook()
+        else:
+            run_polling()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Настройки из переменных окружения. Наличие BOT_TOKEN и ADMIN_CHAT_ID проверяется при создании бота."""
+import os
+
+# Важно: Перед запуском установите переменные окружения BOT_TOKEN и ADMIN_CHAT_ID.
+BOT_TOKEN = os.environ.get('BOT_TOKEN')
+ADMIN_CHAT_ID = os.environ.get('ADMIN_CHAT_ID')
+
+
+def require_credentials():
+    if not BOT_TOKEN or not ADMIN_CHAT_ID:
+        raise ValueError("Переменные окружения BOT_TOKEN и ADMIN_CHAT_ID должны быть установлены!")
+
+
+# Адрес Bot API можно подменить, например, на локальный тестовый сервер
+TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL')
+
+# Число воркеров для обработки обновлений; 0 — обработка в потоке polling
+UPDATE_WORKERS = int(os.environ.get('UPDATE_WORKERS', 8))
+
+# Число процессов-обработчиков; больше 1 — процесс main.py только принимает обновления
+# и раздаёт их процессам по chat.id (см. cluster.py)
+BOT_PROCESSES = int(os.environ.get('BOT_PROCESSES', 1))
+# Номер процесса-обработчика (cluster.SHARD_ENV); задаётся приёмником при запуске
+BOT_SHARD = os.environ.get('BOT_SHARD')
+
+
+def shard_path(path):
+    """У каждого процесса-обработчика свои файлы: sessions.db -> sessions.0.db."""
+    if not path or BOT_SHARD is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{BOT_SHARD}{ext}"
+
+
+# Режим получения обновлений: 'polling' или 'webhook'
+BOT_MODE = os.environ.get('BOT_MODE', 'polling')
+WEBHOOK_URL = os.environ.get('WEBHOOK_URL') # если задан, webhook регистрируется при старте
+WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET') # обязателен в режиме webhook
+WEBHOOK_HOST = os.environ.get('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.environ.get('WEBHOOK_PORT', 8080))
+
+
+def require_webhook_secret():
+    # Без секрета любой, кто достучится до порта, может подсунуть боту обновления
+    if not WEBHOOK_SECRET:
+        raise ValueError("В режиме webhook должна быть установлена переменная окружения WEBHOOK_SECRET!")
+
+
+# Метрики включаются, если задан порт эндпоинта /metrics; процесс-обработчик N слушает METRICS_PORT + N
+METRICS_PORT = int(os.environ.get('METRICS_PORT', 0))
+METRICS_HOST = os.environ.get('METRICS_HOST', '127.0.0.1')
+
+# Лимиты исходящих вызовов: ~30 сообщений в секунду на бота, по одному в секунду на чат
+OUTBOUND_GLOBAL_RATE = float(os.environ.get('OUTBOUND_GLOBAL_RATE', 30))
+OUTBOUND_CHAT_RATE = float(os.environ.get('OUTBOUND_CHAT_RATE', 1))
+OUTBOUND_WORKERS = int(os.environ.get('OUTBOUND_WORKERS', 16))
+
+# Сессии: 'memory' или 'sqlite'
+SESSION_STORE = os.environ.get('SESSION_STORE', 'memory')
+SESSION_DB_PATH = shard_path(os.environ.get('SESSION_DB_PATH', 'sessions.db'))
+SESSION_TTL = int(os.environ.get('SESSION_TTL', 24 * 3600))
+SESSION_MAX = int(os.environ.get('SESSION_MAX', 100000))
+
+# Повторно доставленные обновления отсеиваются по id нажатия или сообщения:
+# помним последние ключи UPDATE_DEDUP_CHATS чатов в течение UPDATE_DEDUP_TTL секунд
+UPDATE_DEDUP_TTL = float(os.environ.get('UPDATE_DEDUP_TTL', 600))
+UPDATE_DEDUP_CHATS = int(os.environ.get('UPDATE_DEDUP_CHATS', 100000))
+
+# Журнал событий опроса для аналитики; пустой EVENT_LOG_PATH отключает запись
+EVENT_LOG_PATH = shard_path(os.environ.get('EVENT_LOG_PATH', 'events.log'))
+EVENT_LOG_FLUSH = float(os.environ.get('EVENT_LOG_FLUSH', 1))
+
+# Вопросы, вердикты, правила подсчёта и тексты описаны в questionnaire.json.
+# Файл перечитывается при изменении (раз в QUESTIONNAIRE_RELOAD секунд, 0 — только по SIGHUP);
+# ошибка в новой версии не мешает работе, остаётся прежняя.
+QUESTIONNAIRE_PATH = os.environ.get(
+    'QUESTIONNAIRE_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'questionnaire.json'))
+QUESTIONNAIRE_RELOAD = float(os.environ.get('QUESTIONNAIRE_RELOAD', 5))
+
+# Заявки администратору: очередь на диске, окно дайджеста и лимит сообщений в минуту
+NOTIFY_DB_PATH = shard_path(os.environ.get('NOTIFY_DB_PATH', 'notifications.db'))
+NOTIFY_WINDOW = float(os.environ.get('NOTIFY_WINDOW', 5))
+# Лимит сообщений в чат администратора делится между процессами-обработчиками
+NOTIFY_PER_MINUTE = max(1, int(os.environ.get('NOTIFY_PER_MINUTE', 20)) // BOT_PROCESSES)
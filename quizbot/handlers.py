@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""Обработчики обновлений: приветствие, вопросы, "Назад", вердикт и заявка администратору."""
+import eventlog
+from questionnaire import escape_markdown_v2, parse_callback
+from sessions import Session
+
+from quizbot import runtime
+from quizbot.telemetry import (ANALYZE_SECONDS, ANSWERS, BACK_PRESSES, DUPLICATE_UPDATES, HANDLER_SECONDS,
+                               OUTBOUND_SAVED, QUESTIONS_SHOWN, QUIZ_STARTS, VERDICTS, metrics)
+
+
+def format_quiz_id(session):
+    return format(session.quiz_id, 'x')
+
+
+# --- Основные функции ---
+
+def new_session(quiz):
+    return Session(len(quiz.questions), version=quiz.version)
+
+
+def render_admin_report(lead):
+    """Формирует текст заявки для администратора (MarkdownV2)."""
+    user_id = lead['user_id']
+    # Досье собирается по той версии опросника, на которой его проходили
+    quiz = runtime.questionnaires.get(lead.get('version')) or runtime.questionnaires.current
+    try:
+        user_info = runtime.admin_api.get_chat(user_id)
+        username = escape_markdown_v2(user_info.username or "N/A")
+        first_name = escape_markdown_v2(user_info.first_name or "")
+    except Exception as e:
+        # Профиль — только украшение: досье собирается из локальных данных, заявка уходит и без него
+        print(f"Не удалось получить профиль пользователя {user_id}: {e}")
+        username, first_name = "N/A", ""
+    verdict_name = lead['verdict_name']
+    verdict = quiz.verdicts_by_name.get(verdict_name)
+    # Прочие ошибки уходят в AdminNotifier: заявка остаётся в очереди и будет сформирована заново
+    return (f"🔔 *Новая заявка на диагностику\\!* \n\n"
+            f"👤 *Пользователь:* @{username} \\({first_name}\\)\n"
+            f"🆔 *User ID:* `{user_id}`\n\n"
+            f"🤖 *Диагноз бота:* {verdict.escaped_name if verdict else escape_markdown_v2(verdict_name)}\n\n"
+            f"{quiz.render_dossier(lead['answers'])}")
+
+
+def notify_admin(user_id, quiz, answers, verdict_name):
+    """Ставит уведомление администратору в очередь; отправляет его фоновый поток."""
+    runtime.admin_notifier.notify({'user_id': user_id, 'answers': list(answers), 'verdict_name': verdict_name,
+                                   'version': quiz.version})
+
+
+def send_verdict(chat_id, quiz, session, verdict_key):
+    """Отправляет финальный вердикт пользователю."""
+    verdict = quiz.verdicts[verdict_key]
+    markup = format_quiz_id(session).join(verdict.markup)
+    runtime.replies.send_message(chat_id, verdict.text, reply_markup=markup)
+    if verdict_key == quiz.no_tracking_verdict:
+        notify_admin(chat_id, quiz, session.answer_indexes(), verdict.name)
+    # Для остальных вердиктов заявка ставится в очередь в analyze_results, до отправки вердикта
+
+
+def ask_question(chat_id, quiz, session, q_index, is_editing=False):
+    """Отправляет вопрос пользователю."""
+    text, markup_parts = quiz.question_payloads[q_index]
+    markup = format_quiz_id(session).join(markup_parts)
+
+    if is_editing:
+        runtime.replies.edit_message_text(text, chat_id, message_id=session.last_message_id, reply_markup=markup)
+    else:
+        sent_message = runtime.replies.send_message(chat_id, text, reply_markup=markup)
+        session.last_message_id = sent_message.message_id
+    
+    session.current_q_index = q_index
+    QUESTIONS_SHOWN.inc(quiz.questions[q_index])
+    runtime.sessions.save(chat_id, session)
+
+
+@metrics.timed(ANALYZE_SECONDS)
+def analyze_results(user_id, quiz, session):
+    """Анализирует ответы и определяет вердикт."""
+    if session is None or not session.is_complete():
+        runtime.replies.send_message(user_id, quiz.messages['incomplete'])
+        return
+
+    answers = session.answer_indexes()
+    verdict_key = quiz.score(answers)
+    verdict = quiz.verdicts[verdict_key]
+    VERDICTS.inc(verdict_key)
+    runtime.events.append(eventlog.VERDICT, user_id, session.quiz_id, value=verdict.number)
+    if verdict_key == quiz.no_tracking_verdict:
+        send_verdict(user_id, quiz, session, verdict_key)
+        return
+
+    notify_admin(user_id, quiz, answers, verdict.name)
+    send_verdict(user_id, quiz, session, verdict_key)
+
+
+# --- Обработчики ---
+
+def outbound_calls(route):
+    """Сколько вызовов Bot API делает обработка нажатия (без заявки администратору)."""
+    if route is None:
+        return 1
+    if route.kind == 'answer':
+        # Снять клавиатуру, прогресс, затем следующий вопрос или "готово" и вердикт
+        return 1 + bool(route.progress_text) + (1 if route.next_index is not None else 2)
+    return 1 if route.kind == 'back' else 2
+
+
+def is_current(session, route, message_id):
+    """Нажатие относится к тому, что пользователь видит сейчас, а не повтор уже обработанного."""
+    if route.kind == 'start_quiz':
+        return session.current_q_index == -1
+    if route.kind in ('answer', 'back'):
+        return route.q_index == session.current_q_index and message_id == session.last_message_id
+    return True
+
+
+def callback_type(call):
+    """Тип нажатия для метрик."""
+    route = runtime.questionnaires.current.routes.get(parse_callback(call.data)[1])
+    return (route.kind if route is not None else 'other',)
+
+
+@metrics.timed(HANDLER_SECONDS, ('send_welcome',))
+def send_welcome(message):
+    user_id = message.chat.id
+    if runtime.recent_updates.seen(user_id, message.message_id):
+        DUPLICATE_UPDATES.inc('repeat')
+        OUTBOUND_SAVED.inc()
+        return
+    quiz = runtime.questionnaires.current
+    session = new_session(quiz)
+    runtime.sessions.save(user_id, session)
+    runtime.replies.send_message(user_id, quiz.welcome_text, reply_markup=format_quiz_id(session).join(quiz.welcome_markup))
+
+
+@metrics.timed(HANDLER_SECONDS, callback_type)
+def handle_callbacks(call):
+    user_id = call.message.chat.id
+    message_id = call.message.message_id
+
+    quiz_id, action = parse_callback(call.data)
+    # Telegram доставил то же нажатие ещё раз (повтор webhook): оно уже обработано, сессию не читаем
+    if runtime.recent_updates.seen(user_id, call.id):
+        DUPLICATE_UPDATES.inc('repeat')
+        OUTBOUND_SAVED.inc(amount=outbound_calls(runtime.questionnaires.current.routes.get(action)))
+        return
+
+    session = runtime.sessions.get(user_id) if action is not None else None
+    quiz = runtime.questionnaires.for_session(session) if session is not None else None
+    route = quiz.routes.get(action) if quiz is not None else None
+
+    # Кнопки старых сообщений, прошлых прохождений и истёкших сессий не трогают состояние
+    if route is None or quiz_id != format_quiz_id(session):
+        stale_text = (quiz or runtime.questionnaires.current).messages['stale_button']
+        runtime.replies.answer_callback_query(call.id, stale_text)
+        return
+
+    # Двойное нажатие или кнопка уже пройденного вопроса: первое нажатие обработано, опрос идёт дальше,
+    # поэтому отвечаем на нажатие молча, без новых сообщений и без предложения начать заново
+    if not is_current(session, route, message_id):
+        DUPLICATE_UPDATES.inc('stale')
+        OUTBOUND_SAVED.inc(amount=outbound_calls(route) - 1)
+        runtime.replies.answer_callback_query(call.id)
+        return
+
+    if route.kind == 'start_quiz':
+        runtime.replies.edit_message_reply_markup(chat_id=user_id, message_id=message_id, reply_markup=None)
+        QUIZ_STARTS.inc()
+        runtime.events.append(eventlog.START, user_id, session.quiz_id)
+        session.history.clear()
+        ask_question(user_id, quiz, session, 0)
+        return
+
+    if route.kind == 'back':
+        BACK_PRESSES.inc(route.question)
+        runtime.events.append(eventlog.BACK, user_id, session.quiz_id, route.q_index)
+        ask_question(user_id, quiz, session, route.next_index, is_editing=True)
+        return
+
+    if route.kind == 'feedback_thanks':
+        runtime.replies.answer_callback_query(call.id, quiz.messages['thanks'])
+        runtime.replies.edit_message_reply_markup(chat_id=user_id, message_id=message_id, reply_markup=None)
+        return
+
+    # Ответ на вопрос
+    runtime.replies.edit_message_reply_markup(chat_id=user_id, message_id=message_id, reply_markup=None)
+    session.set_answer(route.q_index, route.opt_index)
+    if route.next_index is None:
+        # Опрос пройден: повторное нажатие на последнем вопросе не пересчитает вердикт
+        session.current_q_index = len(quiz.questions)
+    ANSWERS.inc(route.question)
+    runtime.events.append(eventlog.ANSWER, user_id, session.quiz_id, route.q_index, route.opt_index)
+    runtime.sessions.save(user_id, session)
+
+    if route.progress_text:
+        runtime.progress.send_message(user_id, route.progress_text)
+
+    if route.next_index is not None:
+        ask_question(user_id, quiz, session, route.next_index)
+    else:
+        runtime.progress.send_message(user_id, quiz.messages['finished'])
+        analyze_results(user_id, quiz, session)
+
+
+def register(bot):
+    bot.register_message_handler(send_welcome, commands=['start'])
+    bot.register_callback_query_handler(handle_callbacks, func=lambda call: True)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Объекты времени выполнения: runtime.bot, runtime.sessions и т.д.
+
+Каждый объект создаётся при первом обращении к атрибуту модуля. Импорт пакета
+поэтому не требует BOT_TOKEN и не тянет telebot, а процесс-приёмник
+многопроцессного режима не открывает файлы сессий и журналов обработчиков.
+"""
+import sys
+import threading
+
+from quizbot import config, telemetry
+
+_lock = threading.RLock()
+_this = sys.modules[__name__]
+
+
+def configure_api():
+    """Подменяет адрес Bot API, если задан TELEGRAM_API_URL."""
+    from telebot import apihelper
+    if config.TELEGRAM_API_URL:
+        apihelper.API_URL = config.TELEGRAM_API_URL
+
+
+def _make_bot():
+    import telebot
+    from quizbot import handlers
+    config.require_credentials()
+    configure_api()
+    # Параллелизм обеспечивает ChatDispatcher, собственный пул telebot не нужен
+    bot = telebot.TeleBot(config.BOT_TOKEN, threaded=False)
+    handlers.register(bot)
+    return bot
+
+
+def _make_outbound():
+    # Все исходящие вызовы идут через планировщик с общим и по-чатовым лимитами.
+    # Очереди по приоритету: вопросы и ответы на нажатия, затем прогресс, затем отчёты админу.
+    from scheduler import SendScheduler
+    metrics = telemetry.metrics
+    outbound = SendScheduler(
+        _this.bot,
+        global_rate=config.OUTBOUND_GLOBAL_RATE,
+        chat_rate=config.OUTBOUND_CHAT_RATE,
+        workers=config.OUTBOUND_WORKERS,
+        latency=telemetry.API_SECONDS if metrics.enabled else None,
+        wait=telemetry.OUTBOUND_WAIT_SECONDS if metrics.enabled else None)
+    metrics.gauge('bot_outbound_queue_depth', "Вызовов в очереди планировщика", lambda: outbound.stats()['queue_depth'])
+    metrics.gauge('bot_outbound_rate_limited', "Ответов 429 от Bot API", lambda: outbound.stats()['rate_limited'])
+    return outbound
+
+
+def _make_lane(priority_name):
+    def make():
+        import scheduler
+        return _this.outbound.lane(getattr(scheduler, priority_name))
+    return make
+
+
+def _make_sessions():
+    # Ответы, текущий вопрос, история для кнопки "Назад" и last_message_id по каждому чату
+    from sessions import create_session_store
+    return create_session_store(config.SESSION_STORE, path=config.SESSION_DB_PATH,
+                                ttl=config.SESSION_TTL, max_size=config.SESSION_MAX)
+
+
+def _make_recent_updates():
+    from dedup import RecentUpdates
+    return RecentUpdates(ttl=config.UPDATE_DEDUP_TTL, max_chats=config.UPDATE_DEDUP_CHATS)
+
+
+def _make_events():
+    import eventlog
+    return eventlog.open_event_log(config.EVENT_LOG_PATH, flush_interval=config.EVENT_LOG_FLUSH)
+
+
+def _make_questionnaires():
+    from questionnaire import QuestionnaireRegistry
+    return QuestionnaireRegistry(config.QUESTIONNAIRE_PATH)
+
+
+def _make_admin_notifier():
+    from notifications import AdminNotifier, NotificationQueue
+    from quizbot import handlers
+    return AdminNotifier(
+        handlers.render_admin_report,
+        lambda text: _this.admin_api.send_message(config.ADMIN_CHAT_ID, text, parse_mode="MarkdownV2"),
+        NotificationQueue(config.NOTIFY_DB_PATH),
+        window=config.NOTIFY_WINDOW,
+        per_minute=config.NOTIFY_PER_MINUTE,
+        failures=telemetry.ADMIN_NOTIFY_FAILURES)
+
+
+_FACTORIES = {
+    'bot': _make_bot,
+    'outbound': _make_outbound,
+    'replies': _make_lane('QUESTION'),
+    'progress': _make_lane('PROGRESS'),
+    'admin_api': _make_lane('ADMIN'),
+    'sessions': _make_sessions,
+    'recent_updates': _make_recent_updates,
+    'events': _make_events,
+    'questionnaires': _make_questionnaires,
+    'admin_notifier': _make_admin_notifier,
+}
+
+
+def __getattr__(name):
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lock:
+        if name not in globals():
+            globals()[name] = factory()
+    return globals()[name]
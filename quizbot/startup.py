@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Профиль запуска (python main.py --profile-startup).
+
+Собирает по очереди всё, что нужно для обработки первого обновления, и печатает
+время каждого этапа и самые тяжёлые импорты. К Bot API не обращается.
+"""
+from collections import defaultdict
+import os
+import sys
+import time
+
+from quizbot import config, runtime
+
+
+class ImportTimer:
+    """Поисковик модулей в начале sys.meta_path: замеряет выполнение кода каждого модуля.
+
+    Собственное время модуля — без вложенных импортов.
+    """
+
+    def __init__(self):
+        self.self_times = {}
+        self._stack = []
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        sys.meta_path.remove(self)
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        # Встроенные и замороженные модули загружаются классами-загрузчиками, их не трогаем
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, 'exec_module'):
+            loader.exec_module = self._timed(name, loader.exec_module)
+        return spec
+
+    def _timed(self, name, exec_module):
+        def timed_exec(module):
+            self._stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - started
+                nested = self._stack.pop()
+                self.self_times[name] = elapsed - nested
+                if self._stack:
+                    self._stack[-1] += elapsed
+        return timed_exec
+
+
+def process_age():
+    """Секунды с запуска процесса (Linux, точность ~10 мс); None, если узнать нельзя."""
+    try:
+        with open('/proc/self/stat') as f:
+            started_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return uptime - started_ticks / os.sysconf('SC_CLK_TCK')
+
+
+def profile(out=sys.stdout, top=12):
+    before_main = process_age()
+    timer = ImportTimer().install()
+    # Профиль не обращается к API, поэтому без настоящих ключей подойдут заглушки
+    config.BOT_TOKEN = config.BOT_TOKEN or '0:profile'
+    config.ADMIN_CHAT_ID = config.ADMIN_CHAT_ID or '0'
+
+    stages = [
+        ("опросник", lambda: runtime.questionnaires),
+        ("telebot, бот и обработчики", lambda: runtime.bot),
+        ("планировщик исходящих", lambda: (runtime.replies, runtime.progress, runtime.admin_api)),
+        ("хранилище сессий", lambda: runtime.sessions),
+        ("журнал событий", lambda: runtime.events),
+        ("уведомления администратора", lambda: runtime.admin_notifier),
+        ("диспетчер обновлений", lambda: __import__('dispatcher')),
+    ]
+    if config.BOT_MODE == 'webhook':
+        stages.append(("webhook-сервер", lambda: __import__('webhook')))
+    if config.BOT_PROCESSES > 1:
+        stages.append(("многопроцессный режим", lambda: __import__('cluster')))
+
+    print(f"{'этап':<32} {'мс':>8} {'модулей':>8}", file=out)
+    if before_main is not None:
+        print(f"{'интерпретатор и импорт quizbot':<32} {before_main * 1000:>8.1f} {len(sys.modules):>8}", file=out)
+    total = 0.0
+    for name, build in stages:
+        modules = len(sys.modules)
+        started = time.perf_counter()
+        build()
+        elapsed = time.perf_counter() - started
+        total += elapsed
+        print(f"{name:<32} {elapsed * 1000:>8.1f} {len(sys.modules) - modules:>8}", file=out)
+    timer.uninstall()
+    print(f"{'итого до первого обновления':<32} {(total + (before_main or 0)) * 1000:>8.1f}", file=out)
+
+    packages = defaultdict(float)
+    for module, seconds in timer.self_times.items():
+        packages[module.split('.', 1)[0]] += seconds
+    print("\nИмпорты по пакетам (собственное время модулей):", file=out)
+    for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<30} {seconds * 1000:>8.1f} мс", file=out)
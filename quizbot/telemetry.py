@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Метрики бота; при METRICS_PORT=0 все метрики — пустые заглушки."""
+from metrics import Metrics
+
+from quizbot import config
+
+metrics = Metrics(enabled=config.METRICS_PORT > 0)
+HANDLER_SECONDS = metrics.histogram('bot_handler_seconds', "Время обработки обновления", ('handler',))
+API_SECONDS = metrics.histogram('bot_api_call_seconds', "Время вызова Bot API", ('method',))
+OUTBOUND_WAIT_SECONDS = metrics.histogram('bot_outbound_wait_seconds', "Ожидание вызова в очереди планировщика",
+                                          ('priority',))
+ANALYZE_SECONDS = metrics.histogram('bot_analyze_seconds', "Время подсчёта вердикта")
+QUIZ_STARTS = metrics.counter('bot_quiz_starts_total', "Начатые диагностики")
+QUESTIONS_SHOWN = metrics.counter('bot_questions_shown_total', "Показы вопросов", ('question',))
+ANSWERS = metrics.counter('bot_answers_total', "Ответы на вопросы", ('question',))
+BACK_PRESSES = metrics.counter('bot_back_presses_total', "Нажатия \"Назад\"", ('question',))
+VERDICTS = metrics.counter('bot_verdicts_total', "Выданные вердикты", ('verdict',))
+DUPLICATE_UPDATES = metrics.counter('bot_duplicate_updates_total', "Отсеянные повторные и устаревшие обновления",
+                                    ('reason',))
+OUTBOUND_SAVED = metrics.counter('bot_outbound_calls_saved_total', "Вызовы Bot API, не сделанные из-за отсева повторов")
+ADMIN_NOTIFY_FAILURES = metrics.counter('bot_admin_notify_failures_total', "Неудачные отправки админу")
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Ограничение частоты исходящих запросов."""
+import multiprocessing
+import threading
+import time
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity за раз."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Забирает токены (в долг, если их нет) и возвращает, сколько секунд нужно подождать."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def is_full(self):
+        """Ведро наполнилось: от только что созданного оно ничем не отличается."""
+        with self._lock:
+            return self._tokens + (self._clock() - self._updated) * self.rate >= self.capacity
+
+    def defer(self, seconds):
+        """Не выдаёт токены ближайшие seconds секунд (например, после ответа 429)."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate, -seconds * self.rate)
+            self._updated = now
+
+    def acquire(self, tokens=1):
+        """Блокирует поток, пока токены не станут доступны."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class SharedTokenBucket(TokenBucket):
+    """Ведро токенов в разделяемой памяти: один лимит на несколько процессов.
+
+    Создаётся в родительском процессе и передаётся процессам аргументом при запуске.
+    """
+
+    def __init__(self, rate, capacity=None, context=None):
+        context = context or multiprocessing.get_context('spawn')
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = time.monotonic # CLOCK_MONOTONIC общий для всех процессов машины
+        self._state = context.RawArray('d', (self.capacity, self._clock())) # токены, время обновления
+        self._lock = context.Lock()
+
+    def reserve(self, tokens=1):
+        with self._lock:
+            state = self._state
+            now = self._clock()
+            state[0] = min(self.capacity, state[0] + (now - state[1]) * self.rate) - tokens
+            state[1] = now
+            if state[0] >= 0:
+                return 0.0
+            return -state[0] / self.rate
+
+    def defer(self, seconds):
+        with self._lock:
+            state = self._state
+            now = self._clock()
+            state[0] = min(self.capacity, state[0] + (now - state[1]) * self.rate, -seconds * self.rate)
+            state[1] = now
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""Центральный планировщик исходящих запросов к Telegram Bot API.
+
+Все вызовы бота идут через очередь с приоритетами. Сообщения ограничиваются
+общим ведром токенов (~30 в секунду на бота) и ведром на каждый чат,
+ответ 429 приостанавливает отправку на retry_after секунд. Временные сбои
+(5xx, обрыв соединения) повторяются с экспоненциальной задержкой.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+import itertools
+import queue
+import threading
+import time
+
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from telebot.apihelper import ApiTelegramException
+
+from backoff import Backoff
+from ratelimit import TokenBucket
+
+# Классы приоритета: меньше — раньше
+QUESTION = 0 # вопросы, вердикты, ответы на нажатия
+PROGRESS = 1 # промежуточные сообщения о прогрессе
+ADMIN = 2 # отчёты администратору
+
+PRIORITY_NAMES = {QUESTION: 'question', PROGRESS: 'progress', ADMIN: 'admin'}
+
+# Методы, которые отправляют или меняют сообщения: подпадают под общий лимит бота
+MESSAGE_METHODS = frozenset({'send_message', 'edit_message_text', 'edit_message_reply_markup'})
+# Новые сообщения дополнительно ограничены лимитом на чат
+CHAT_LIMITED_METHODS = frozenset({'send_message'})
+# Как часто выбрасывать вёдра чатов, которые успели наполниться, секунд
+CHAT_SWEEP_INTERVAL = 60.0
+# Позиция chat_id среди аргументов метода TeleBot, если он не первый
+CHAT_ID_POSITIONS = {'edit_message_text': 1} # edit_message_text(text, chat_id, ...)
+
+
+def chat_id_of_call(method, args, kwargs):
+    """Чат, в который пишет вызов bot.<method>; None для остальных методов."""
+    if method not in MESSAGE_METHODS:
+        return None
+    if 'chat_id' in kwargs:
+        return kwargs['chat_id']
+    position = CHAT_ID_POSITIONS.get(method, 0)
+    return args[position] if len(args) > position else None
+
+
+def is_transient(error):
+    """Сбой, который стоит повторить: 5xx от Bot API или соединение не установлено/оборвано.
+
+    Таймаут чтения не повторяется: сообщение могло уже уйти, повтор его продублирует.
+    """
+    if isinstance(error, ApiTelegramException):
+        return error.error_code >= 500
+    return isinstance(error, (RequestsConnectionError, ConnectionError))
+
+
+class _Job:
+    __slots__ = ('priority', 'method', 'chat_id', 'args', 'kwargs', 'future', 'queued', 'attempts', 'backoff')
+
+    def __init__(self, priority, method, chat_id, args, kwargs):
+        self.priority = priority
+        self.method = method
+        self.chat_id = chat_id
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.queued = time.monotonic()
+        self.attempts = 0
+        self.backoff = None # создаётся при первом временном сбое
+
+
+class _Stats:
+    __slots__ = ('sent', 'failed', 'wait_total', 'wait_max')
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class SendScheduler:
+    """Обёртка над TeleBot: вызовы выполняются пулом потоков в порядке приоритета."""
+
+    def __init__(self, bot, global_rate=30, chat_rate=1, chat_burst=3, workers=8, max_attempts=5, latency=None,
+                 wait=None, retry_base=0.5, retry_cap=10.0):
+        self.bot = bot
+        self.latency = latency # гистограмма длительности вызовов API по методам
+        self.wait = wait # гистограмма ожидания в очереди по классам приоритета
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self._workers = workers
+        # Общий лимит бота; в многопроцессном режиме до первого вызова заменяется на SharedTokenBucket
+        self.global_limit = TokenBucket(global_rate)
+        self._chats = {}
+        self._chats_lock = threading.Lock()
+        self._next_sweep = time.monotonic() + CHAT_SWEEP_INTERVAL
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._stats = {priority: _Stats() for priority in PRIORITY_NAMES}
+        self._rate_limited = 0
+        self._retried = 0
+        self._stats_lock = threading.Lock()
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._executor = None
+
+    def lane(self, priority):
+        """Представление планировщика с методами бота, вызываемыми с заданным приоритетом."""
+        return _Lane(self, priority)
+
+    def call(self, priority, method, *args, **kwargs):
+        """Ставит вызов bot.<method> в очередь и ждёт результата."""
+        job = _Job(priority, method, chat_id_of_call(method, args, kwargs), args, kwargs)
+        self._ensure_started()
+        self._queue.put((priority, next(self._seq), job))
+        return job.future.result()
+
+    def stats(self):
+        """Метрики: глубина очереди, число 429 и повторов и время ожидания по классам приоритета."""
+        return {
+            'queue_depth': self._queue.qsize(),
+            'rate_limited': self._rate_limited,
+            'retried': self._retried,
+            'chat_buckets': len(self._chats),
+            'priorities': {
+                PRIORITY_NAMES[priority]: {
+                    'sent': stats.sent,
+                    'failed': stats.failed,
+                    'wait_avg': stats.wait_total / stats.sent if stats.sent else 0.0,
+                    'wait_max': stats.wait_max,
+                }
+                for priority, stats in self._stats.items()
+            },
+        }
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._start_lock:
+            if not self._started:
+                self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="outbound")
+                threading.Thread(target=self._run, name="outbound-scheduler", daemon=True).start()
+                self._started = True
+
+    def _chat_bucket(self, chat_id):
+        # Чистим до выдачи ведра, чтобы не выбросить то, которое сейчас будет использовано
+        if time.monotonic() >= self._next_sweep:
+            self._sweep_chats()
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            with self._chats_lock:
+                bucket = self._chats.setdefault(chat_id, TokenBucket(self.chat_rate, self.chat_burst))
+        return bucket
+
+    def _sweep_chats(self):
+        """Удаляет полные вёдра: память не растёт с числом чатов, писавших когда-либо."""
+        with self._chats_lock:
+            now = time.monotonic()
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + CHAT_SWEEP_INTERVAL
+            for chat_id in [chat_id for chat_id, bucket in self._chats.items() if bucket.is_full()]:
+                del self._chats[chat_id]
+
+    def _run(self):
+        while True:
+            _, _, job = self._queue.get()
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            if job.chat_id is not None:
+                self.global_limit.acquire()
+            self._executor.submit(self._execute, job)
+
+    def _execute(self, job):
+        if job.chat_id is not None and job.method in CHAT_LIMITED_METHODS:
+            self._chat_bucket(job.chat_id).acquire()
+        stats = self._stats[job.priority]
+        waited = time.monotonic() - job.queued
+        job.attempts += 1
+        started = time.perf_counter()
+        try:
+            result = getattr(self.bot, job.method)(*job.args, **job.kwargs)
+        except ApiTelegramException as e:
+            self._observe(job, started)
+            if e.error_code == 429 and job.attempts < self.max_attempts:
+                with self._stats_lock:
+                    self._rate_limited += 1
+                retry_after = (e.result_json.get('parameters') or {}).get('retry_after', 1)
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                self.global_limit.defer(retry_after) # при общем лимите пауза видна и другим процессам
+                self._queue.put((job.priority, next(self._seq), job))
+                return
+            self._retry_or_fail(job, e)
+            return
+        except Exception as e:
+            self._observe(job, started)
+            self._retry_or_fail(job, e)
+            return
+        self._observe(job, started)
+        with self._stats_lock:
+            stats.sent += 1
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+        if self.wait is not None:
+            self.wait.observe(waited, PRIORITY_NAMES[job.priority])
+        job.future.set_result(result)
+
+    def _observe(self, job, started):
+        if self.latency is not None:
+            self.latency.observe(time.perf_counter() - started, job.method)
+
+    def _retry_or_fail(self, job, error):
+        if job.attempts >= self.max_attempts or not is_transient(error):
+            self._fail(job, error)
+            return
+        with self._stats_lock:
+            self._retried += 1
+        if job.backoff is None:
+            job.backoff = Backoff(self.retry_base, self.retry_cap)
+        # Задержка только у этого вызова: остальные идут своим чередом, поток пула не занят ожиданием
+        timer = threading.Timer(job.backoff.next(), self._queue.put, args=((job.priority, next(self._seq), job),))
+        timer.daemon = True
+        timer.start()
+
+    def _fail(self, job, error):
+        with self._stats_lock:
+            self._stats[job.priority].failed += 1
+        job.future.set_exception(error)
+
+
+class _Lane:
+    __slots__ = ('_scheduler', '_priority')
+
+    def __init__(self, scheduler, priority):
+        self._scheduler = scheduler
+        self._priority = priority
+
+    def __getattr__(self, method):
+        scheduler, priority = self._scheduler, self._priority
+
+        def call(*args, **kwargs):
+            return scheduler.call(priority, method, *args, **kwargs)
+        return call
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Хранилища сессий опроса: ответы, текущий вопрос, история и last_message_id."""
+from collections import OrderedDict
+import random
+import sqlite3
+import struct
+import threading
+import time
+
+# current_q_index, last_message_id, quiz_id, число вопросов, длина истории
+_HEADER = struct.Struct('<bqIBB')
+# Версия опросника пишется после истории: записи без неё читаются с версией 0
+_VERSION = struct.Struct('<I')
+
+class Session:
+    """Компактная запись сессии одного чата.
+
+    Ответы хранятся как байт на вопрос: индекс варианта + 1, 0 — нет ответа.
+    """
+    __slots__ = ('answers', 'current_q_index', 'last_message_id', 'quiz_id', 'history', 'version')
+
+    def __init__(self, questions_count, current_q_index=-1, last_message_id=0, answers=None, history=None, quiz_id=None,
+                 version=0):
+        self.answers = bytearray(answers if answers is not None else questions_count)
+        self.current_q_index = current_q_index
+        self.last_message_id = last_message_id
+        # Идентификатор прохождения: зашивается в callback_data, чтобы отсеивать устаревшие кнопки
+        self.quiz_id = quiz_id if quiz_id is not None else random.getrandbits(32)
+        self.history = bytearray(history or b'')
+        # Версия опросника, на которой начато прохождение
+        self.version = version
+
+    def set_answer(self, q_index, opt_index):
+        self.answers[q_index] = opt_index + 1
+
+    def is_complete(self):
+        return 0 not in self.answers
+
+    def answer_indexes(self):
+        """Индексы выбранных вариантов по порядку вопросов (-1 — нет ответа)."""
+        return tuple(value - 1 for value in self.answers)
+
+    def to_bytes(self):
+        header = _HEADER.pack(self.current_q_index, self.last_message_id, self.quiz_id,
+                              len(self.answers), len(self.history))
+        return header + bytes(self.answers) + bytes(self.history) + _VERSION.pack(self.version)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        current_q_index, last_message_id, quiz_id, questions_count, history_len = _HEADER.unpack_from(blob)
+        offset = _HEADER.size
+        answers = blob[offset:offset + questions_count]
+        offset += questions_count
+        history = blob[offset:offset + history_len]
+        offset += history_len
+        version = _VERSION.unpack_from(blob, offset)[0] if len(blob) >= offset + _VERSION.size else 0
+        return cls(questions_count, current_q_index, last_message_id, answers, history, quiz_id, version)
+
+
+def evict_lru(items, max_size, ttl, now):
+    """Вытесняет из OrderedDict {ключ: (время обращения, значение)} записи старше ttl и сверх max_size.
+
+    Записи должны идти в порядке обращения (move_to_end при каждом): просроченные и лишние — в начале.
+    """
+    while items:
+        key, (touched, _) = next(iter(items.items()))
+        if len(items) <= max_size and now - touched <= ttl:
+            break
+        del items[key]
+
+
+class MemorySessionStore:
+    """LRU-хранилище в памяти: вытесняет самые старые сессии и брошенные дольше ttl секунд."""
+
+    def __init__(self, max_size=100000, ttl=24 * 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict() # chat_id -> (время последнего обращения, Session)
+        self._lock = threading.Lock()
+
+    def get(self, chat_id):
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(chat_id)
+            if item is None:
+                return None
+            touched, session = item
+            if now - touched > self.ttl:
+                del self._items[chat_id]
+                return None
+            self._items[chat_id] = (now, session)
+            self._items.move_to_end(chat_id)
+            return session
+
+    def save(self, chat_id, session):
+        now = time.monotonic()
+        with self._lock:
+            self._items[chat_id] = (now, session)
+            self._items.move_to_end(chat_id)
+            evict_lru(self._items, self.max_size, self.ttl, now)
+
+    def delete(self, chat_id):
+        with self._lock:
+            self._items.pop(chat_id, None)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteSessionStore:
+    """Долговременное хранилище в SQLite (WAL): незавершённый опрос переживает перезапуск."""
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path='sessions.db', ttl=24 * 3600):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._saves = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            'chat_id INTEGER PRIMARY KEY, data BLOB NOT NULL, updated REAL NOT NULL)')
+
+    def get(self, chat_id):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, updated FROM sessions WHERE chat_id = ?', (chat_id,)).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[1] > self.ttl:
+                self._conn.execute('DELETE FROM sessions WHERE chat_id = ?', (chat_id,))
+                return None
+        return Session.from_bytes(row[0])
+
+    def save(self, chat_id, session):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sessions (chat_id, data, updated) VALUES (?, ?, ?)',
+                (chat_id, session.to_bytes(), time.time()))
+            self._saves += 1
+            if self._saves % self.PURGE_EVERY == 0:
+                self._purge()
+
+    def delete(self, chat_id):
+        with self._lock:
+            self._conn.execute('DELETE FROM sessions WHERE chat_id = ?', (chat_id,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    def _purge(self):
+        self._conn.execute('DELETE FROM sessions WHERE updated < ?', (time.time() - self.ttl,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_session_store(backend='memory', path='sessions.db', ttl=24 * 3600, max_size=100000):
+    """Создаёт хранилище по имени бэкенда: 'memory' или 'sqlite'."""
+    if backend == 'memory':
+        return MemorySessionStore(max_size=max_size, ttl=ttl)
+    if backend == 'sqlite':
+        return SQLiteSessionStore(path=path, ttl=ttl)
+    raise ValueError(f"Неизвестное хранилище сессий: {backend}")
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Приём обновлений через webhook: лёгкий HTTP-сервер вместо long polling."""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hmac
+import json
+import queue
+import threading
+
+from telebot.types import Update
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+# Обновления Telegram — единицы килобайт; больший запрос не читаем
+MAX_BODY_SIZE = 1 << 20
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128 # всплески запросов от Telegram
+
+
+class WebhookServer:
+    """Принимает JSON обновлений, сразу отвечает 200 и ставит их в очередь.
+
+    Отдельный поток забирает очередь пачками до batch_size и передаёт их в process.
+    С parse=False обновления передаются словарями, без разбора в Update.
+    """
+
+    def __init__(self, process, host='0.0.0.0', port=8080, secret=None, path='/',
+                 batch_size=100, queue_size=10000, parse=True):
+        self._process = process # callable(список Update)
+        self.parse = parse
+        self.secret = secret
+        self.path = path
+        self.batch_size = batch_size
+        self._queue = queue.Queue(queue_size)
+        self._httpd = _HTTPServer((host, port), self._make_handler())
+        self._consumer = threading.Thread(target=self._consume, name="webhook-consumer", daemon=True)
+        self._consumer.start()
+
+    @property
+    def server_address(self):
+        return self._httpd.server_address
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self):
+        """Запускает сервер в фоновом потоке (для тестов и прогона записанных обновлений)."""
+        thread = threading.Thread(target=self._httpd.serve_forever, name="webhook-http", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._queue.put(None)
+        self._consumer.join()
+
+    def join(self):
+        """Ждёт обработки всех принятых обновлений."""
+        self._queue.join()
+
+    def _authorized(self, headers):
+        if self.secret is None:
+            return True
+        # http.server декодирует заголовки как latin-1; сравниваем байты, чтобы не-ASCII не ломал compare_digest
+        token = (headers.get(SECRET_HEADER) or '').encode('latin-1')
+        return hmac.compare_digest(token, self.secret.encode())
+
+    def _accept(self, body):
+        """Возвращает HTTP-код ответа на тело запроса Telegram."""
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400
+        if not isinstance(payload, dict) or 'update_id' not in payload:
+            return 400
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            return 503 # Telegram повторит доставку позже
+        return 200
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                # Секрет и размер проверяются до чтения тела: чужой запрос не заставит буферизовать данные
+                length = self.headers.get('Content-Length') or '0'
+                if self.path != server.path:
+                    status = 404
+                elif not server._authorized(self.headers):
+                    status = 403
+                elif not length.isdigit():
+                    status = 400
+                elif int(length) > MAX_BODY_SIZE:
+                    status = 413
+                else:
+                    status = server._accept(self.rfile.read(int(length)))
+                if status != 200:
+                    self.close_connection = True # непрочитанное тело не должно стать следующим запросом
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _consume(self):
+        while True:
+            payload = self._queue.get()
+            if payload is None:
+                self._queue.task_done()
+                return
+            batch = [payload]
+            while len(batch) < self.batch_size:
+                try:
+                    payload = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if payload is None:
+                    self._queue.put(None) # обработаем пачку и остановимся на следующем круге
+                    self._queue.task_done()
+                    break
+                batch.append(payload)
+            try:
+                self._process([Update.de_json(item) for item in batch] if self.parse else batch)
+            except Exception as e:
+                print(f"Ошибка при обработке пачки обновлений: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()